@@ -0,0 +1,262 @@
+"""Scripted gameplay scenarios timed frame by frame.
+
+    python src/benchmark.py [--headless] [--out bench_results.json]
+    python src/benchmark.py --baseline bench_baseline.json
+
+Writes p50/p95/p99 update and draw milliseconds of every scenario to a JSON
+file. Exits with status 1 when a scenario's p99 update time is over its
+budget or, with --baseline, when a percentile got slower than the threshold
+allows against a stored result file.
+"""
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable
+import argparse
+import json
+import platform
+import sys
+
+import arcade
+import numpy as np
+
+from engine.headless import HeadlessWindow
+from engine.rng import rng, set_base_seed
+from engine.sim_clock import SIM_TICK
+from entities.enemy import MAX_ENEMY_TP, MIN_ENEMY_TP
+from entities.fighter import FirstBoss
+from main import WINDOW_HEIGHT, WINDOW_WIDTH
+from views.fight_view import FightView
+from views.game_view import GameView
+from views.upgrade_tree import UpgradeTreeView
+
+
+BENCH_FRAMES = 600
+BENCH_WARMUP_FRAMES = 60
+BENCH_SEED = 0
+HORDE_SPREAD = 1500  # enemies start within this distance of the player
+CROWD_SPREAD = 300
+BENCH_PLAYER_HP = 10**9  # a crowd of thousands must not end the run within a frame
+REGRESSION_THRESHOLD = 0.1
+REGRESSION_MIN_MS = 0.05  # smaller slowdowns are timer noise whatever their ratio
+PERCENTILES = (50, 95, 99)
+UPDATE_BUDGET_MS = 1000 / 60  # p99 update time that still leaves a 60 FPS frame
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Shows the scenario's views on the window, returns a callback run before every frame
+    setup: Callable[[object], Callable[[], None]]
+    update_budget_ms: float = UPDATE_BUDGET_MS
+
+
+def start_game(window, enemies=0, spread=HORDE_SPREAD):
+    game_view = GameView()
+    game_view.save_path = None
+    game_view.enemies_cnt = enemies
+    game_view.replayable = True
+    window.show_view(game_view)
+    player = game_view.player
+    for _ in range(enemies):
+        pos = game_view.tile_index.sample_in_rect(
+            player.center_x - spread,
+            player.center_y - spread,
+            player.center_x + spread,
+            player.center_y + spread,
+        )
+        if pos is None:
+            pos = game_view.tile_index.sample()
+        game_view.enemy_pool.acquire(rng.randint(MIN_ENEMY_TP, MAX_ENEMY_TP), *pos)
+    return game_view
+
+
+def keep_alive(game_view):
+    game_view.player.max_hitpoints = BENCH_PLAYER_HP
+
+    def before_frame():
+        game_view.player.hitpoints = game_view.player.max_hitpoints
+
+    return before_frame
+
+
+def idle(window):
+    return keep_alive(start_game(window))
+
+
+def horde(enemies):
+    def setup(window):
+        return keep_alive(start_game(window, enemies))
+
+    return setup
+
+
+def attack_crowd(window):
+    game_view = start_game(window, 1000, CROWD_SPREAD)
+    game_view.space_pressed = True
+    return keep_alive(game_view)
+
+
+def boss_phase(phase):
+    def setup(window):
+        game_view = start_game(window)
+        boss = FirstBoss()
+        window.show_view(FightView(game_view, boss))
+        heal = keep_alive(game_view)
+
+        def before_frame():
+            heal()
+            if boss.cur_attack_type != phase:
+                boss.cur_attack_type = phase
+                boss.attacking_time = 0
+
+        return before_frame
+
+    return setup
+
+
+def upgrade_tree(window):
+    game_view = start_game(window)
+    window.show_view(UpgradeTreeView(game_view))
+    return keep_alive(game_view)
+
+
+SCENARIOS = [
+    Scenario("idle", idle),
+    Scenario("horde_100", horde(100)),
+    Scenario("horde_1k", horde(1000)),
+    Scenario("horde_10k", horde(10000)),
+    Scenario("attack_crowd", attack_crowd),
+    Scenario("boss_shield", boss_phase(0)),
+    Scenario("boss_rest", boss_phase(1)),
+    Scenario("boss_balls", boss_phase(2)),
+    Scenario("upgrade_tree", upgrade_tree),
+]
+
+
+def percentiles(samples):
+    values = np.percentile(np.array(samples) * 1000, PERCENTILES)
+    return {f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, values)}
+
+
+def run_scenario(window, scenario, frames, warmup, headless):
+    set_base_seed(BENCH_SEED)
+    before_frame = scenario.setup(window)
+    update_times = []
+    draw_times = []
+    for frame in range(warmup + frames):
+        before_frame()
+        view = window.current_view
+        start = perf_counter()
+        view.on_update(SIM_TICK)
+        updated = perf_counter()
+        if not headless:
+            window.dispatch_events()
+            view.on_draw()
+            window.ctx.finish()  # count the GPU work the frame queued
+            window.flip()
+        drawn = perf_counter()
+        if frame >= warmup:
+            update_times.append(updated - start)
+            draw_times.append(drawn - updated)
+    result = {"frames": frames, "update_ms": percentiles(update_times)}
+    if not headless:
+        result["draw_ms"] = percentiles(draw_times)
+    return result
+
+
+def over_budget(results, scenarios):
+    """Prints the scenarios whose p99 update time is over their budget, returns them"""
+    over = []
+    for scenario in scenarios:
+        p99 = results["scenarios"][scenario.name]["update_ms"]["p99"]
+        if p99 > scenario.update_budget_ms:
+            print(
+                f"{scenario.name:14} update_ms p99 {p99:9.3f} "
+                f"over the {scenario.update_budget_ms:.3f} ms budget"
+            )
+            over.append(scenario.name)
+    return over
+
+
+def compare(results, baseline, threshold):
+    """Prints every percentile against the baseline, returns the regressed ones"""
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name}: not in baseline")
+            continue
+        for metric in ("update_ms", "draw_ms"):
+            if metric not in result or metric not in base:
+                continue
+            for key, value in result[metric].items():
+                old = base[metric][key]
+                change = (value - old) / old if old else 0.0
+                mark = ""
+                if change > threshold and value - old > REGRESSION_MIN_MS:
+                    mark = "  REGRESSION"
+                    regressions.append((name, metric, key))
+                print(
+                    f"{name:14} {metric:9} {key:4} "
+                    f"{old:9.3f} -> {value:9.3f} {change:+7.1%}{mark}"
+                )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time scripted gameplay scenarios")
+    parser.add_argument(
+        "--headless", action="store_true", help="time updates only, no window"
+    )
+    parser.add_argument("--frames", type=int, default=BENCH_FRAMES)
+    parser.add_argument("--warmup", type=int, default=BENCH_WARMUP_FRAMES)
+    parser.add_argument(
+        "--scenarios", nargs="*", help="names of the scenarios to run, all by default"
+    )
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="result file to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.headless:
+        window = HeadlessWindow(WINDOW_WIDTH, WINDOW_HEIGHT)
+    else:
+        window = arcade.Window(WINDOW_WIDTH, WINDOW_HEIGHT, "benchmark", vsync=False)
+    scenarios = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    results = {
+        "meta": {
+            "headless": args.headless,
+            "python": platform.python_version(),
+            "arcade": arcade.__version__,
+            "machine": platform.machine(),
+            "seed": BENCH_SEED,
+        },
+        "scenarios": {},
+    }
+    for scenario in scenarios:
+        result = run_scenario(window, scenario, args.frames, args.warmup, args.headless)
+        results["scenarios"][scenario.name] = result
+        summary = ", ".join(
+            f"{metric} " + " ".join(f"{k}={v:.3f}" for k, v in result[metric].items())
+            for metric in ("update_ms", "draw_ms")
+            if metric in result
+        )
+        print(f"{scenario.name}: {summary}")
+
+    with open(args.out, "w") as out_file:
+        json.dump(results, out_file, indent=2)
+
+    failed = bool(over_budget(results, scenarios))
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        failed = bool(compare(results, baseline, args.threshold)) or failed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+from os.path import dirname, join
+import json
+import math
+
+import numpy as np
+from PIL import Image
+
+from engine.tile_index import BLOCKING_LAYERS, GID_MASK, load_layer_gids
+
+
+FLIPPED_HORIZONTALLY = 0x80000000
+FLIPPED_VERTICALLY = 0x40000000
+COLLISION_EPS = 1e-6
+
+
+def _tileset_for_gid(tilesets, gid):
+    found = None
+    for tileset in tilesets:
+        if tileset["firstgid"] <= gid:
+            found = tileset
+    return found
+
+
+def extract_tile_shape(map_dir, tilesets, raw_gid, tile_width, tile_height):
+    """Tile-local (x0, y0, x1, y1) box, y up, of the solid part of a tile.
+
+    Uses the tile's collision objects from Tiled when present, otherwise the
+    bounding box of its opaque pixels, otherwise the whole tile.
+    """
+    gid = raw_gid & GID_MASK
+    full = (0.0, 0.0, float(tile_width), float(tile_height))
+    tileset = _tileset_for_gid(tilesets, gid)
+    if tileset is None:
+        return full
+    local_id = gid - tileset["firstgid"]
+    box = None  # x0, top, x1, bottom in image coordinates (y down)
+
+    for tile in tileset.get("tiles", ()):
+        if tile["id"] == local_id and "objectgroup" in tile:
+            objects = tile["objectgroup"]["objects"]
+            if objects:
+                box = (
+                    min(obj["x"] for obj in objects),
+                    min(obj["y"] for obj in objects),
+                    max(obj["x"] + obj.get("width", 0) for obj in objects),
+                    max(obj["y"] + obj.get("height", 0) for obj in objects),
+                )
+            break
+
+    if box is None and "image" in tileset:
+        try:
+            image = Image.open(join(map_dir, tileset["image"]))
+        except OSError:
+            return full
+        margin = tileset.get("margin", 0)
+        spacing = tileset.get("spacing", 0)
+        col, row = local_id % tileset["columns"], local_id // tileset["columns"]
+        left = margin + col * (tileset["tilewidth"] + spacing)
+        top = margin + row * (tileset["tileheight"] + spacing)
+        tile_image = image.convert("RGBA").crop(
+            (left, top, left + tileset["tilewidth"], top + tileset["tileheight"])
+        )
+        box = tile_image.getchannel("A").getbbox()
+
+    if box is None:
+        return full
+    x0, top, x1, bottom = box
+    if raw_gid & FLIPPED_HORIZONTALLY:
+        x0, x1 = tile_width - x1, tile_width - x0
+    if raw_gid & FLIPPED_VERTICALLY:
+        top, bottom = tile_height - bottom, tile_height - top
+    return float(x0), float(tile_height - bottom), float(x1), float(tile_height - top)
+
+
+class CollisionGrid:
+    """Solid box of every blocking tile, stored as (rows, cols) arrays in world coordinates"""
+
+    def __init__(self, solid, boxes, tile_width, tile_height):
+        self.solid = solid
+        self.box_x0, self.box_y0, self.box_x1, self.box_y1 = boxes
+        self.rows, self.cols = solid.shape
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+
+    @classmethod
+    def from_file(cls, path, blocking=BLOCKING_LAYERS):
+        with open(path) as map_file:
+            map_json = json.load(map_file)
+        return cls.from_json(map_json, dirname(path), blocking)
+
+    @classmethod
+    def from_json(cls, map_json, map_dir, blocking=BLOCKING_LAYERS):
+        tile_width, tile_height = map_json["tilewidth"], map_json["tileheight"]
+        width, height = map_json["width"], map_json["height"]
+        raw_layers = load_layer_gids(map_json, keep_flags=True)
+        tilesets = sorted(map_json["tilesets"], key=lambda tileset: tileset["firstgid"])
+        shapes = {}  # raw gid: tile-local box, every distinct tile is extracted once
+
+        solid = np.zeros((height, width), dtype=np.bool_)
+        boxes = [np.full((height, width), np.inf), np.full((height, width), np.inf)]
+        boxes += [np.full((height, width), -np.inf), np.full((height, width), -np.inf)]
+        for name in blocking:
+            gids = raw_layers[name]
+            for raw_gid in np.unique(gids[(gids & GID_MASK) != 0]).tolist():
+                if raw_gid not in shapes:
+                    shapes[raw_gid] = extract_tile_shape(
+                        map_dir, tilesets, raw_gid, tile_width, tile_height
+                    )
+                x0, y0, x1, y1 = shapes[raw_gid]
+                cells = gids == raw_gid
+                solid |= cells
+                boxes[0][cells] = np.minimum(boxes[0][cells], x0)
+                boxes[1][cells] = np.minimum(boxes[1][cells], y0)
+                boxes[2][cells] = np.maximum(boxes[2][cells], x1)
+                boxes[3][cells] = np.maximum(boxes[3][cells], y1)
+
+        rows, cols = np.indices((height, width))
+        boxes[0] += cols * tile_width
+        boxes[2] += cols * tile_width
+        boxes[1] += rows * tile_height
+        boxes[3] += rows * tile_height
+        return cls(solid, boxes, tile_width, tile_height)
+
+    def _resolve_axis(self, x, y, delta, half_w, half_h, axis):
+        """Moves boxes centered at (x, y) by delta along axis, stopping at solid boxes ahead"""
+        if axis == 0:
+            pos, other, half, other_half = x, y, half_w, half_h
+            size, other_size = self.tile_width, self.tile_height
+            lo_arr, hi_arr, other_lo_arr, other_hi_arr = (
+                self.box_x0, self.box_x1, self.box_y0, self.box_y1
+            )
+            limit, other_limit = self.cols, self.rows
+        else:
+            pos, other, half, other_half = y, x, half_h, half_w
+            size, other_size = self.tile_height, self.tile_width
+            lo_arr, hi_arr, other_lo_arr, other_hi_arr = (
+                self.box_y0, self.box_y1, self.box_x0, self.box_x1
+            )
+            limit, other_limit = self.rows, self.cols
+
+        new_pos = pos + delta
+        lo = np.minimum(pos, new_pos) - half
+        hi = np.maximum(pos, new_pos) + half
+        other_lo = other - other_half
+        other_hi = other + other_half
+        first = np.floor(lo / size).astype(np.int64)
+        last = np.floor(hi / size).astype(np.int64)
+        other_first = np.floor(other_lo / other_size).astype(np.int64)
+        other_last = np.floor(other_hi / other_size).astype(np.int64)
+        span = int((last - first).max(initial=0)) + 1
+        other_span = int((other_last - other_first).max(initial=0)) + 1
+
+        for i in range(span):
+            cell = first + i
+            for j in range(other_span):
+                other_cell = other_first + j
+                valid = (
+                    (cell <= last)
+                    & (other_cell <= other_last)
+                    & (cell >= 0)
+                    & (cell < limit)
+                    & (other_cell >= 0)
+                    & (other_cell < other_limit)
+                )
+                cell_c = np.where(valid, cell, 0)
+                other_c = np.where(valid, other_cell, 0)
+                if axis == 0:
+                    index = (other_c, cell_c)
+                else:
+                    index = (cell_c, other_c)
+                box_lo = lo_arr[index]
+                box_hi = hi_arr[index]
+                hit = (
+                    valid
+                    & self.solid[index]
+                    & (other_lo_arr[index] < other_hi)
+                    & (other_hi_arr[index] > other_lo)
+                )
+                # Only boxes ahead of the leading edge block, so overlapping movers can get out
+                ahead = hit & (delta > 0) & (box_lo >= pos + half - COLLISION_EPS)
+                new_pos = np.where(ahead, np.minimum(new_pos, box_lo - half), new_pos)
+                behind = hit & (delta < 0) & (box_hi <= pos - half + COLLISION_EPS)
+                new_pos = np.where(behind, np.maximum(new_pos, box_hi + half), new_pos)
+        return new_pos
+
+    def move(self, x, y, dx, dy, half_w, half_h):
+        """Batched axis-separated move of boxes centered at (x, y), returns new centers"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        new_x = self._resolve_axis(x, y, dx, half_w, half_h, 0)
+        new_y = self._resolve_axis(new_x, y, dy, half_w, half_h, 1)
+        return new_x, new_y
+
+    def is_blocked(self, x, y):
+        col = math.floor(x / self.tile_width)
+        row = math.floor(y / self.tile_height)
+        if not (0 <= row < self.rows and 0 <= col < self.cols) or not self.solid[row, col]:
+            return False
+        return bool(
+            self.box_x0[row, col] <= x <= self.box_x1[row, col]
+            and self.box_y0[row, col] <= y <= self.box_y1[row, col]
+        )
+
+
+class TileCollisionEngine:
+    """Drop-in for PhysicsEngineSimple that resolves the sprite against the tile grid"""
+
+    def __init__(self, player_sprite, grid: CollisionGrid):
+        self.player_sprite = player_sprite
+        self.grid = grid
+
+    def update(self):
+        sprite = self.player_sprite
+        if not sprite.change_x and not sprite.change_y:
+            return
+        points = sprite.get_adjusted_hit_box()
+        left = min(point[0] for point in points)
+        right = max(point[0] for point in points)
+        bottom = min(point[1] for point in points)
+        top = max(point[1] for point in points)
+        box_x, box_y = (left + right) / 2, (bottom + top) / 2
+        new_x, new_y = self.grid.move(
+            box_x, box_y, sprite.change_x, sprite.change_y, (right - left) / 2, (top - bottom) / 2
+        )
+        sprite.position = (
+            sprite.center_x + float(new_x) - box_x,
+            sprite.center_y + float(new_y) - box_y,
+        )
@@ -0,0 +1,178 @@
+from functools import lru_cache
+from os.path import join
+
+import arcade
+from arcade.gl import BufferDescription
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from engine.world_cache import world_cache
+from entities.enemy import HP_BAR_HEIGHT
+
+
+DAMAGE_NUMBER_COLOR = arcade.color.RED
+DAMAGE_NUMBER_GLYPHS = "-0123456789."
+DAMAGE_NUMBER_SIZE = 16  # px, what arcade.draw_text's 12 pt default comes to
+# Bold system fonts first, arcade's bundled font when none is installed
+DAMAGE_NUMBER_FONTS = (
+    "arialbd.ttf",
+    "Arial Bold.ttf",
+    "DejaVuSans-Bold.ttf",
+    "LiberationSans-Bold.ttf",
+    ":resources:fonts/ttf/Kenney Future.ttf",
+)
+DAMAGE_NUMBER_LIFETIME = 1.0  # seconds, the shader fades and rises over one
+MAX_DAMAGE_GLYPHS = 4096  # the oldest glyphs are overwritten past this
+VERTICES_PER_GLYPH = 6
+# anchor x, y, corner x, y, u, v, time received
+FLOATS_PER_VERTEX = 7
+QUAD_CORNERS = np.array([(0, 0), (1, 0), (1, 1), (0, 0), (1, 1), (0, 1)], dtype=np.float32)
+DAMAGE_NUMBERS_VERTEX_SHADER = join("src", "shader", "damage_numbers_vs.glsl")
+DAMAGE_NUMBERS_FRAGMENT_SHADER = join("src", "shader", "damage_numbers_fs.glsl")
+
+
+def _load_font(size):
+    for name in DAMAGE_NUMBER_FONTS:
+        if name.startswith(":resources:"):
+            name = str(arcade.resources.resolve_resource_path(name))
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def glyph_atlas(glyphs=DAMAGE_NUMBER_GLYPHS, size=DAMAGE_NUMBER_SIZE):
+    """(image, {glyph: (x, width)}, height) with the glyphs side by side in
+    white, the image flipped so row 0 is the bottom like GL textures"""
+    font = _load_font(size)
+    ascent, descent = font.getmetrics()
+    height = ascent + descent
+    columns = {}
+    x = 0
+    for glyph in glyphs:
+        width = int(np.ceil(font.getlength(glyph)))
+        columns[glyph] = (x, width)
+        x += width + 1  # a blank column keeps linear filtering from bleeding
+    image = Image.new("RGBA", (x, height), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(image)
+    for glyph, (glyph_x, _) in columns.items():
+        draw.text((glyph_x, 0), glyph, font=font, fill=(255, 255, 255, 255))
+    return image.transpose(Image.Transpose.FLIP_TOP_BOTTOM), columns, height
+
+
+class DamageNumbers:
+    """Floating damage numbers of every enemy in one draw call, two when
+    the live ones wrap around the ring.
+
+    Numbers are laid out once into a ring of glyph quads, each carrying
+    the time it was received; the vertex shader makes them rise and fade
+    from that, so nothing is rewritten while they float. Numbers stay where
+    the enemy was hit. GL objects are made on the first draw.
+    """
+
+    def __init__(self, capacity=MAX_DAMAGE_GLYPHS):
+        self.capacity = capacity
+        self.image, self.columns, self.glyph_height = glyph_atlas()
+        self.uvs = {
+            glyph: (x / self.image.width, (x + width) / self.image.width)
+            for glyph, (x, width) in self.columns.items()
+        }
+        self.data = np.zeros((capacity, VERTICES_PER_GLYPH, FLOATS_PER_VERTEX), dtype=np.float32)
+        self.data[..., 6] = -np.inf  # long gone
+        self.head = 0  # next glyph slot to write
+        self.dirty = None  # (first, end) glyph slots not uploaded yet, or everything
+        self.ctx = None
+        self.buffer = None
+        self.geometry = None
+        self.program = None
+        self.atlas = None
+
+    def add(self, damage, x, y, when):
+        """Lays out -damage from (x, y) on, vertically centered, one glyph quad per character"""
+        text = f"{-damage:.1f}"
+        glyphs = np.zeros((len(text), VERTICES_PER_GLYPH, FLOATS_PER_VERTEX), dtype=np.float32)
+        left = 0
+        for i, glyph in enumerate(text):
+            width = self.columns[glyph][1]
+            u0, u1 = self.uvs[glyph]
+            glyphs[i, :, 2] = left + QUAD_CORNERS[:, 0] * width
+            glyphs[i, :, 3] = (QUAD_CORNERS[:, 1] - 0.5) * self.glyph_height
+            glyphs[i, :, 4] = u0 + QUAD_CORNERS[:, 0] * (u1 - u0)
+            glyphs[i, :, 5] = QUAD_CORNERS[:, 1]
+            left += width
+        glyphs[..., 0] = x
+        glyphs[..., 1] = y
+        glyphs[..., 6] = when
+        for glyph in glyphs:
+            self.data[self.head] = glyph
+            self._mark(self.head)
+            self.head = (self.head + 1) % self.capacity
+
+    def _mark(self, slot):
+        if self.dirty is None:
+            self.dirty = (slot, slot + 1)
+        elif self.dirty[1] == slot:
+            self.dirty = (self.dirty[0], slot + 1)
+        else:
+            # Wrapped around the ring
+            self.dirty = (0, self.capacity)
+
+    def take(self, enemy, when):
+        """Moves the damage an enemy received since the last frame in, above its hp bar"""
+        x, y = enemy.center_x, enemy.top + HP_BAR_HEIGHT // 2
+        while enemy.damaged_queue:
+            damage, received = enemy.damaged_queue.pop()
+            if when - received < DAMAGE_NUMBER_LIFETIME:
+                self.add(damage, x, y, received)
+
+    def _create(self):
+        self.ctx = arcade.get_window().ctx
+        self.buffer = self.ctx.buffer(data=self.data.tobytes())
+        self.geometry = self.ctx.geometry(
+            [
+                BufferDescription(
+                    self.buffer, "2f 2f 2f 1f", ["in_anchor", "in_corner", "in_uv", "in_received"]
+                )
+            ]
+        )
+        self.program = world_cache.program(
+            arcade.get_window(),
+            DAMAGE_NUMBERS_VERTEX_SHADER,
+            DAMAGE_NUMBERS_FRAGMENT_SHADER,
+        )
+        self.program["rise"] = HP_BAR_HEIGHT
+        self.program["color"] = arcade.get_four_float_color(DAMAGE_NUMBER_COLOR)
+        self.atlas = self.ctx.texture(self.image.size, components=4, data=self.image.tobytes())
+        self.dirty = None
+
+    def draw(self, time):
+        if self.ctx is None:
+            self._create()
+        if self.dirty is not None:
+            first, end = self.dirty
+            stride = VERTICES_PER_GLYPH * FLOATS_PER_VERTEX * 4
+            self.buffer.write(self.data[first:end].tobytes(), offset=first * stride)
+            self.dirty = None
+        # Glyphs are written in the order they float off, the live ones run
+        # from the oldest still floating up to the head
+        live = np.flatnonzero(self.data[:, 0, 6] > time - DAMAGE_NUMBER_LIFETIME)
+        if not len(live):
+            return
+        oldest = live[np.argmin((live - self.head) % self.capacity)]
+        if oldest < self.head:
+            ranges = ((oldest, self.head),)
+        elif self.head:
+            ranges = ((oldest, self.capacity), (0, self.head))
+        else:
+            ranges = ((oldest, self.capacity),)
+        self.program["time"] = time
+        self.atlas.use(0)
+        for first, end in ranges:
+            self.geometry.render(
+                self.program,
+                mode=self.ctx.TRIANGLES,
+                first=first * VERTICES_PER_GLYPH,
+                vertices=(end - first) * VERTICES_PER_GLYPH,
+            )
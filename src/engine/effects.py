@@ -0,0 +1,142 @@
+from os.path import join
+
+import arcade
+from arcade.gl import BufferDescription
+import numpy as np
+
+from engine.world_cache import world_cache
+
+
+SHIELD = 0
+GLOW = 1
+BEAM = 2
+# The glow fades as (radius / distance) ** 1.7 without ever reaching zero, its
+# quad ends where that drops below half a step of an 8 bit color channel
+GLOW_EXTENT = (2 * 255) ** (1 / 1.7)
+SHIELD_EDGE = 1  # px past the radius, where the ring is brightest
+INITIAL_EFFECTS = 64
+MAX_BEAMS = 16  # beams of one full window pass, same as in the beams shader
+# center x, y, half size, radius, color r, g, b, kind for shields and glows,
+# x, y, angle, length, color r, g, b, kind for beams
+FLOATS_PER_EFFECT = 8
+QUAD_CORNERS = np.array([(-1, -1), (1, -1), (-1, 1), (1, 1)], dtype=np.float32)
+EFFECTS_VERTEX_SHADER = join("src", "shader", "effects_vs.glsl")
+EFFECTS_FRAGMENT_SHADER = join("src", "shader", "effects_fs.glsl")
+BEAMS_VERTEX_SHADER = join("src", "shader", "beams_vs.glsl")
+BEAMS_FRAGMENT_SHADER = join("src", "shader", "beams_fs.glsl")
+
+
+class EffectRenderer:
+    """Shields, glowing balls and beams of a frame drawn in as few calls as
+    their order allows.
+
+    Effects are added in world coordinates and drawn in that order. Shields
+    and glows are instanced quads just big enough for what they light up.
+    Beams fade too slowly across their line for anything smaller than the
+    window, so a run of them is evaluated together in one full window pass
+    that blends them over each other in the shader. Positions are moved
+    into window pixels in double precision before the upload, the boss
+    arena lies far enough out for float32 world positions to shift the thin
+    beams visibly. Colors are taken like the shadertoy uniforms they
+    replace, channels clamp to 1. GL objects are made on the first draw.
+    """
+
+    def __init__(self):
+        self.instances = []
+        self.capacity = 0
+        self.ctx = None
+        self.program = None
+        self.beams_program = None
+        self.corners = None
+        self.buffer = None
+        self.geometry = None
+        self.window_quad = None
+
+    def add_shield(self, x, y, radius, color):
+        self.instances.append((x, y, radius + SHIELD_EDGE, radius, *color, SHIELD))
+
+    def add_glow(self, x, y, radius, color):
+        self.instances.append((x, y, radius * GLOW_EXTENT, radius, *color, GLOW))
+
+    def add_beam(self, x, y, angle, length, color):
+        """A line through (x, y) at angle, length only sets the direction"""
+        self.instances.append((x, y, angle, length, *color, BEAM))
+
+    def _create(self):
+        window = arcade.get_window()
+        self.ctx = window.ctx
+        self.program = world_cache.program(window, EFFECTS_VERTEX_SHADER, EFFECTS_FRAGMENT_SHADER)
+        self.beams_program = world_cache.program(
+            window, BEAMS_VERTEX_SHADER, BEAMS_FRAGMENT_SHADER
+        )
+        self.corners = self.ctx.buffer(data=QUAD_CORNERS.tobytes())
+        self.window_quad = self.ctx.geometry(
+            [BufferDescription(self.corners, "2f", ["in_corner"])]
+        )
+
+    def _reserve(self, effects):
+        if effects <= self.capacity:
+            return
+        capacity = max(self.capacity, INITIAL_EFFECTS)
+        while capacity < effects:
+            capacity *= 2
+        if self.buffer is None:
+            self.buffer = self.ctx.buffer(reserve=capacity * FLOATS_PER_EFFECT * 4)
+            self.geometry = self.ctx.geometry(
+                [
+                    BufferDescription(self.corners, "2f", ["in_corner"]),
+                    BufferDescription(
+                        self.buffer,
+                        "2f 1f 1f 3f 1f",
+                        ["in_center", "in_half_size", "in_radius", "in_color", "in_kind"],
+                        instanced=True,
+                    ),
+                ]
+            )
+        else:
+            self.buffer.orphan(capacity * FLOATS_PER_EFFECT * 4)
+        self.capacity = capacity
+
+    def _draw_quads(self, quads, viewport):
+        self._reserve(len(quads))
+        self.buffer.write(quads.astype(np.float32).tobytes())
+        self.program["viewport"] = viewport
+        self.geometry.render(
+            self.program,
+            mode=self.ctx.TRIANGLE_STRIP,
+            vertices=len(QUAD_CORNERS),
+            instances=len(quads),
+        )
+
+    def _draw_beams(self, beams, viewport):
+        for first in range(0, len(beams), MAX_BEAMS):
+            batch = beams[first : first + MAX_BEAMS]
+            lines = np.zeros((MAX_BEAMS, 4))
+            colors = np.zeros((MAX_BEAMS, 3))
+            lines[: len(batch)] = batch[:, :4]
+            lines[: len(batch), :2] += viewport[:2]
+            colors[: len(batch)] = batch[:, 4:7]
+            self.beams_program["beams"] = lines.ravel().tolist()
+            self.beams_program["beam_colors"] = colors.ravel().tolist()
+            self.beams_program["beam_count"] = len(batch)
+            self.window_quad.render(
+                self.beams_program, mode=self.ctx.TRIANGLE_STRIP, vertices=len(QUAD_CORNERS)
+            )
+
+    def draw(self, camera):
+        if not self.instances:
+            return
+        if self.ctx is None:
+            self._create()
+        instances = np.array(self.instances, dtype=np.float64)
+        instances[:, 0] -= camera.position.x
+        instances[:, 1] -= camera.position.y
+        viewport = self.ctx.viewport
+        # Runs of beams and of quads, in the order they were added
+        is_beam = instances[:, 7] == BEAM
+        for run in np.split(instances, np.flatnonzero(np.diff(is_beam)) + 1):
+            if run[0, 7] == BEAM:
+                self._draw_beams(run, viewport)
+            else:
+                self._draw_quads(run, viewport)
+        self.instances.clear()
@@ -0,0 +1,36 @@
+from math import ceil
+
+from entities.enemy import Enemy, MAX_ENEMY_TP, MIN_ENEMY_TP
+
+
+class EnemyPool:
+    """Pre-built enemies per type, dead ones are parked invisible in their
+    sprite list slot and re-armed instead of constructing new sprites"""
+
+    def __init__(self, sprite_list, sim):
+        self.sprite_list = sprite_list
+        self.sim = sim
+        self.free = {tp: [] for tp in range(MIN_ENEMY_TP, MAX_ENEMY_TP + 1)}
+
+    def _build(self, tp):
+        enemy = Enemy.from_tp(tp)
+        enemy.visible = False
+        self.sprite_list.append(enemy)
+        return enemy
+
+    def prefill(self, total):
+        per_tp = ceil(total / len(self.free))
+        for tp, free in self.free.items():
+            while len(free) < per_tp:
+                free.append(self._build(tp))
+
+    def acquire(self, tp, x, y):
+        free = self.free[tp]
+        enemy = free.pop() if free else self._build(tp)
+        enemy.reset(tp, x, y)
+        self.sim.add(enemy)
+        return enemy
+
+    def release(self, enemy):
+        enemy.visible = False
+        self.free[enemy.tp].append(enemy)
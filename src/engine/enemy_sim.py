@@ -0,0 +1,382 @@
+import numpy as np
+
+from engine.spatial_grid import TILE_SIZE, SpatialGrid
+from entities.animated import TEXTURE_CHANGE_DISTANCE
+from utils import EPS
+
+
+INITIAL_CAPACITY = 256
+ENEMY_HALF_SIZE = 12  # collision box around the enemy's center
+
+# Simulation level of detail: enemies this close to the target or mid-swing tick
+# every step, the rest of the view ticks in LOD_SLICES round-robin slices and
+# enemies out of view and out of reach are not ticked at all. Sprites are
+# interpolated over the time a move covered, so sliced enemies glide too
+LOD_NEAR_RADIUS = 384
+LOD_SLICES = 3
+LOD_MAX_TICK_DT = 0.1  # longest time handed to an enemy woken up after a while
+SYNC_MARGIN = 64  # px around the view in which sprites are synced, wider than a sprite
+
+# Enemies bound and unbound by every simulation so far, read by the hitch detector
+totals = {"added": 0, "removed": 0}
+
+# name: dtype. Every enemy bound to the simulation owns one slot in each array
+FIELDS = {
+    "x": np.float64,
+    "y": np.float64,
+    "prev_x": np.float64,  # where the sprite starts its interpolation to x, y
+    "prev_y": np.float64,
+    "moved_at": np.float64,  # clock of the last move
+    "move_dt": np.float64,  # time the last move covered, the sprite takes as long
+    "shown_x": np.float64,  # sprite position as last synced
+    "shown_y": np.float64,
+    "anim_x": np.float64,  # sprite position at its last texture change
+    "anim_y": np.float64,
+    "animate": np.bool_,  # ticked and moved since its last sync
+    "speed": np.float64,
+    "hitpoints": np.float64,
+    "dead": np.bool_,
+    "is_attacking": np.bool_,
+    "damaged": np.bool_,
+    "attacking_timer": np.float64,
+    "attack_range": np.float64,
+    "attack_start_range": np.float64,
+    "end_time": np.float64,
+    "attack_damage": np.int64,
+    "no_attack": np.bool_,
+    "does_activate_shield": np.bool_,
+    "tp": np.int8,
+    "cell_x": np.int64,
+    "cell_y": np.int64,
+    "last_tick": np.float64,
+}
+# Mutable per-enemy state, moved between the sprite and the arrays on (un)binding
+BOUND_STATE = ("hitpoints", "dead", "is_attacking", "damaged", "attacking_timer")
+
+
+class SimField:
+    """Sprite attribute stored in the enemy simulation arrays while bound"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj.sim is None:
+            return obj.__dict__[self.name]
+        return getattr(obj.sim, self.name)[obj.sim_index].item()
+
+    def __set__(self, obj, value):
+        if obj.sim is None:
+            obj.__dict__[self.name] = value
+        else:
+            getattr(obj.sim, self.name)[obj.sim_index] = value
+
+
+def in_rect(x, y, rect_x, rect_y, rect_w, rect_h):
+    return (rect_x < x) & (x < rect_x + rect_w) & (rect_y < y) & (y < rect_y + rect_h)
+
+
+class EnemySimulation:
+    """Struct-of-arrays storage and batched update of all live enemies.
+
+    Slots ``[0, count)`` are always dense, removal swaps the last enemy into
+    the freed slot. Sprites are only touched by ``sync_sprites``, which
+    writes interpolated positions of the enemies still on their way in or
+    near the view. Out of view they wait until the view reaches them. The
+    animation is checked at the rate enemies tick, so the near tier animates
+    every tick and the sliced one once per slice. It is only called once a
+    sprite walked far enough to switch texture. A spatial grid over
+    slot ids keeps per-frame work proportional to the enemies near the
+    player and the camera rather than to the whole horde.
+    """
+
+    def __init__(
+        self,
+        capacity=INITIAL_CAPACITY,
+        cell_size=TILE_SIZE,
+        collision=None,
+        flow_field=None,
+        lod_near_radius=LOD_NEAR_RADIUS,
+        lod_slices=LOD_SLICES,
+    ):
+        self.count = 0
+        self.clock = 0.0
+        self.last_dt = 0.0
+        self.frame = 0
+        self.lod_near_radius = lod_near_radius
+        self.lod_slices = lod_slices
+        self.collision = collision
+        self.flow_field = flow_field
+        self.capacity = 0
+        self.sprites = []
+        self.grid = SpatialGrid(cell_size)
+        self.max_attack_range = 0
+        self.interpolating = np.zeros(0, dtype=np.int64)  # sprites not at x, y yet
+        self._unsynced = []
+        for name, dtype in FIELDS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, capacity):
+        for name, dtype in FIELDS.items():
+            arr = np.zeros(capacity, dtype=dtype)
+            arr[: self.count] = getattr(self, name)[: self.count]
+            setattr(self, name, arr)
+        self.capacity = capacity
+
+    def add(self, enemy):
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        index = self.count
+        attack = enemy.attack
+        state = {name: enemy.__dict__.pop(name) for name in BOUND_STATE}
+        self.x[index] = enemy.center_x
+        self.y[index] = enemy.center_y
+        self.prev_x[index] = enemy.center_x
+        self.prev_y[index] = enemy.center_y
+        self.speed[index] = enemy.speed
+        self.attack_range[index] = attack.attack_range
+        self.attack_start_range[index] = attack.attack_start_range
+        self.end_time[index] = attack.end_time
+        self.attack_damage[index] = attack.damage
+        self.no_attack[index] = attack.no_attack
+        self.does_activate_shield[index] = enemy.does_activate_shield
+        self.tp[index] = enemy.tp
+        self.last_tick[index] = self.clock
+        self.moved_at[index] = self.clock
+        self.shown_x[index] = enemy.center_x
+        self.shown_y[index] = enemy.center_y
+        if enemy.first_change:
+            self.anim_x[index] = self.anim_y[index] = np.inf
+        else:
+            self.anim_x[index], self.anim_y[index] = enemy.last_center
+        cell = self.grid.cell_of(enemy.center_x, enemy.center_y)
+        self.cell_x[index], self.cell_y[index] = cell
+        self.grid.insert(index, cell)
+        self.max_attack_range = max(self.max_attack_range, attack.attack_range)
+        self.sprites.append(enemy)
+        self.count += 1
+        totals["added"] += 1
+        enemy.sim = self
+        enemy.sim_index = index
+        for name, value in state.items():
+            setattr(enemy, name, value)
+
+    def remove(self, enemy):
+        index = enemy.sim_index
+        state = {name: getattr(enemy, name) for name in BOUND_STATE}
+        last = self.count - 1
+        self.grid.remove(index, self._cell(index))
+        if index != last:
+            last_cell = self._cell(last)
+            self.grid.remove(last, last_cell)
+            self.grid.insert(index, last_cell)
+            for name in FIELDS:
+                arr = getattr(self, name)
+                arr[index] = arr[last]
+            moved = self.sprites[last]
+            self.sprites[index] = moved
+            moved.sim_index = index
+            # Its new slot may not be interpolating, so finish its interpolation now
+            self.prev_x[index] = self.shown_x[index] = self.x[index]
+            self.prev_y[index] = self.shown_y[index] = self.y[index]
+            moved.position = (self.x[index].item(), self.y[index].item())
+        self.sprites.pop()
+        self.count -= 1
+        totals["removed"] += 1
+        enemy.sim = None
+        enemy.sim_index = None
+        enemy.__dict__.update(state)
+
+    def _cell(self, index):
+        return self.cell_x[index].item(), self.cell_y[index].item()
+
+    def _update_cells(self, indices):
+        size = self.grid.cell_size
+        cell_x = np.floor_divide(self.x[indices], size).astype(np.int64)
+        cell_y = np.floor_divide(self.y[indices], size).astype(np.int64)
+        changed = (cell_x != self.cell_x[indices]) | (cell_y != self.cell_y[indices])
+        for i, new_x, new_y in zip(
+            indices[changed].tolist(), cell_x[changed].tolist(), cell_y[changed].tolist()
+        ):
+            self.grid.move(i, self._cell(i), (new_x, new_y))
+        self.cell_x[indices] = cell_x
+        self.cell_y[indices] = cell_y
+
+    def query_rect(self, rect_x, rect_y, rect_w, rect_h):
+        """Enemies strictly inside the rectangle"""
+        idx = self.grid.query_rect(rect_x, rect_y, rect_w, rect_h)
+        inside = in_rect(self.x[idx], self.y[idx], rect_x, rect_y, rect_w, rect_h)
+        return [self.sprites[i] for i in idx[inside].tolist()]
+
+    def query_radius(self, x, y, radius):
+        """Enemies strictly closer than radius to (x, y)"""
+        idx = self.grid.query_radius(x, y, radius)
+        dist = np.hypot(self.x[idx] - x, self.y[idx] - y)
+        return [self.sprites[i] for i in idx[dist < radius].tolist()]
+
+    def query_cone(self, x, y, dir_x, dir_y, radius):
+        """Enemies in the half disc of the given radius facing (dir_x, dir_y)"""
+        idx = self.grid.query_radius(x, y, radius)
+        dx = self.x[idx] - x
+        dy = self.y[idx] - y
+        inside = (np.hypot(dx, dy) < radius) & (dx * dir_x + dy * dir_y > 0)
+        return [self.sprites[i] for i in idx[inside].tolist()]
+
+    def collect_dead(self):
+        dead = [self.sprites[i] for i in np.flatnonzero(self.dead[: self.count])]
+        for enemy in dead:
+            self.remove(enemy)
+        return dead
+
+    def step(self, delta_time, target, view_x, view_y, view_w, view_h):
+        """Advance the simulation clock by delta_time, ticking enemies by their
+        level of detail with the time since their last tick. Returns the number
+        of active shields in view."""
+        n = self.count
+        self.clock += delta_time
+        self.last_dt = delta_time
+        self.frame += 1
+        if n == 0:
+            return 0
+        target_x, target_y = target.center_x, target.center_y
+        # Only enemies in view, in reach of the target or mid-swing can change state
+        candidates = np.union1d(
+            np.union1d(
+                self.grid.query_rect(view_x, view_y, view_w, view_h),
+                self.grid.query_radius(target_x, target_y, self.max_attack_range),
+            ),
+            np.flatnonzero(self.is_attacking[:n]),
+        )
+        candidate_x = self.x[candidates]
+        candidate_y = self.y[candidates]
+        candidate_dist = np.hypot(target_x - candidate_x, target_y - candidate_y)
+        candidate_in_view = in_rect(candidate_x, candidate_y, view_x, view_y, view_w, view_h)
+        shields = int(
+            np.count_nonzero(candidate_in_view & self.does_activate_shield[candidates])
+        )
+        near = (
+            (candidate_dist <= self.lod_near_radius)
+            | (candidate_dist <= self.attack_start_range[candidates])
+            | self.is_attacking[candidates]
+        )
+        in_slice = (candidates + self.frame) % self.lod_slices == 0
+        ticked = near | (candidate_in_view & in_slice)
+
+        idx = candidates[ticked]
+        x = candidate_x[ticked]
+        y = candidate_y[ticked]
+        dist = candidate_dist[ticked]
+        dx = target_x - x
+        dy = target_y - y
+        dt = np.minimum(self.clock - self.last_tick[idx], LOD_MAX_TICK_DT)
+        self.last_tick[idx] = self.clock
+
+        # Attacks in progress, an out of range target skips to the end of the swing
+        was_attacking = self.is_attacking[idx]
+        timer = self.attacking_timer[idx]
+        end_time = self.end_time[idx]
+        timer[was_attacking] += dt[was_attacking]
+        out_of_range = was_attacking & (timer < end_time) & (dist > self.attack_range[idx])
+        timer[out_of_range] = end_time[out_of_range]
+        finished = was_attacking & (timer >= end_time)
+        for i in idx[finished & ~self.damaged[idx]].tolist():
+            target.damage(self.attack_damage[i].item())
+
+        start_range = self.attack_start_range[idx]
+        starting = ~was_attacking & ~self.no_attack[idx] & (dist <= start_range)
+        timer[starting] = 0
+        self.attacking_timer[idx] = timer
+        self.is_attacking[idx] = (was_attacking & ~finished) | starting
+        self.damaged[idx[starting]] = False
+        for i in idx[starting].tolist():
+            self.sprites[i].attacking_target = target
+
+        in_view = candidate_in_view[ticked]
+        idle_in_view = ~was_attacking & ~starting & in_view
+        moving = idle_in_view & (dist > start_range)
+        moved = idx[moving]
+        moving_dist = np.maximum(dist[moving], EPS)
+        dir_x = dx[moving] / moving_dist
+        dir_y = dy[moving] / moving_dist
+        if self.flow_field is not None:
+            # Steer around water and walls, straight at the target on its own tile
+            self.flow_field.set_target(target_x, target_y)
+            flow_x, flow_y = self.flow_field.sample(x[moving], y[moving])
+            has_flow = (flow_x != 0) | (flow_y != 0)
+            dir_x = np.where(has_flow, flow_x, dir_x)
+            dir_y = np.where(has_flow, flow_y, dir_y)
+        # The sprite goes on from where it is shown, it may not have arrived yet
+        along = self._interpolation(moved, self.clock)
+        self.prev_x[moved] += (x[moving] - self.prev_x[moved]) * along
+        self.prev_y[moved] += (y[moving] - self.prev_y[moved]) * along
+        self.moved_at[moved] = self.clock
+        self.move_dt[moved] = dt[moving]
+        self.animate[moved] = True
+        step_len = self.speed[moved] * dt[moving]
+        if self.collision is None:
+            self.x[moved] = x[moving] + dir_x * step_len
+            self.y[moved] = y[moving] + dir_y * step_len
+        else:
+            self.x[moved], self.y[moved] = self.collision.move(
+                x[moving],
+                y[moving],
+                dir_x * step_len,
+                dir_y * step_len,
+                ENEMY_HALF_SIZE,
+                ENEMY_HALF_SIZE,
+            )
+        self._update_cells(moved)
+        self._unsynced.append(moved)
+
+        return shields
+
+    def _interpolation(self, indices, time):
+        """How far along from prev to x the sprites are at the given time"""
+        elapsed = time - self.moved_at[indices]
+        return np.minimum(elapsed / np.maximum(self.move_dt[indices], EPS), 1)
+
+    def sync_sprites(self, alpha, view_x, view_y, view_w, view_h):
+        """Moves sprites in the view of the enemies on their way to where they
+        are alpha of a tick after the last one and animates them"""
+        n = self.count
+        pending = np.unique(np.concatenate(self._unsynced + [self.interpolating]))
+        pending = pending[pending < n]
+        self._unsynced = []
+        # A sprite left behind out of view may be shown inside it once the view moves
+        rect = (
+            view_x - SYNC_MARGIN,
+            view_y - SYNC_MARGIN,
+            view_w + 2 * SYNC_MARGIN,
+            view_h + 2 * SYNC_MARGIN,
+        )
+        in_view = in_rect(self.x[pending], self.y[pending], *rect) | in_rect(
+            self.shown_x[pending], self.shown_y[pending], *rect
+        )
+        deferred = pending[~in_view]
+        pending = pending[in_view]
+        along = self._interpolation(pending, self.clock + alpha * self.last_dt)
+        prev_x = self.prev_x[pending]
+        prev_y = self.prev_y[pending]
+        render_x = prev_x + (self.x[pending] - prev_x) * along
+        render_y = prev_y + (self.y[pending] - prev_y) * along
+        self.interpolating = np.concatenate((pending[along < 1], deferred))
+        self.shown_x[pending] = render_x
+        self.shown_y[pending] = render_y
+        animated = self.animate[pending] & (
+            np.hypot(render_x - self.anim_x[pending], render_y - self.anim_y[pending])
+            >= TEXTURE_CHANGE_DISTANCE
+        )
+        self.animate[pending] = False
+        self.anim_x[pending[animated]] = render_x[animated]
+        self.anim_y[pending[animated]] = render_y[animated]
+        sprites = self.sprites
+        for i, new_x, new_y in zip(pending.tolist(), render_x.tolist(), render_y.tolist()):
+            sprites[i].position = (new_x, new_y)
+        for i in pending[animated].tolist():
+            sprites[i].update_animation()
@@ -0,0 +1,192 @@
+from collections import deque
+import heapq
+import math
+
+import numpy as np
+
+
+UNREACHED = np.iinfo(np.int32).max
+FLOW_UPDATE_RADIUS = 12  # tiles around the target refreshed when it steps to a neighbour tile
+FLOW_MAX_DRIFT = 6  # tiles the target may walk away before the whole field is rebuilt
+
+# (row, col) offsets, rows grow with y
+NEIGHBOUR_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+NEIGHBOUR_DIRS = np.array(
+    [(dc / math.hypot(dr, dc), dr / math.hypot(dr, dc)) for dr, dc in NEIGHBOUR_OFFSETS]
+)
+
+
+class FlowField:
+    """BFS distance to the target tile over walkable tiles plus the direction of
+    the steepest descent from every tile, sampled by the whole horde in O(1)"""
+
+    def __init__(
+        self,
+        walkable: np.ndarray,
+        tile_width,
+        tile_height,
+        update_radius=FLOW_UPDATE_RADIUS,
+        max_drift=FLOW_MAX_DRIFT,
+    ):
+        self.walkable = walkable
+        self.rows, self.cols = walkable.shape
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.update_radius = update_radius
+        self.max_drift = max_drift
+        # Padded by one unreachable tile so neighbour lookups never go out of bounds
+        self._distance = np.full((self.rows + 2, self.cols + 2), UNREACHED, dtype=np.int32)
+        self.distance = self._distance[1:-1, 1:-1]
+        self.dir_x = np.zeros(walkable.shape, dtype=np.float64)
+        self.dir_y = np.zeros(walkable.shape, dtype=np.float64)
+        self.target = None
+        self.full_target = None
+        self.full_recomputes = 0
+        self.partial_updates = 0
+
+    def cell_at(self, x, y):
+        col = math.floor(x / self.tile_width)
+        row = math.floor(y / self.tile_height)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def set_target(self, x, y):
+        cell = self.cell_at(x, y)
+        if cell is None or cell == self.target:
+            return
+        if (
+            self.target is None
+            or max(abs(cell[0] - self.target[0]), abs(cell[1] - self.target[1])) > 1
+            or max(abs(cell[0] - self.full_target[0]), abs(cell[1] - self.full_target[1]))
+            > self.max_drift
+        ):
+            self.recompute(cell)
+        else:
+            self.update_around(cell)
+        self.target = cell
+
+    def _bfs(self, seed, row0, row1, col0, col1):
+        height, width = row1 - row0, col1 - col0
+        walkable = self.walkable[row0:row1, col0:col1].tolist()
+        dist = [[UNREACHED] * width for _ in range(height)]
+        seed_row, seed_col = seed[0] - row0, seed[1] - col0
+        dist[seed_row][seed_col] = 0
+        queue = deque([(seed_row, seed_col)])
+        while queue:
+            row, col = queue.popleft()
+            next_dist = dist[row][col] + 1
+            for n_row, n_col in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+                if (
+                    0 <= n_row < height
+                    and 0 <= n_col < width
+                    and walkable[n_row][n_col]
+                    and dist[n_row][n_col] == UNREACHED
+                ):
+                    dist[n_row][n_col] = next_dist
+                    queue.append((n_row, n_col))
+        return np.array(dist, dtype=np.int32)
+
+    def _update_directions(self, row0, row1, col0, col1):
+        height, width = row1 - row0, col1 - col0
+        padded = self._distance[row0 : row1 + 2, col0 : col1 + 2]
+
+        def shifted(d_row, d_col):
+            return padded[1 + d_row : 1 + d_row + height, 1 + d_col : 1 + d_col + width]
+
+        candidates = []
+        for d_row, d_col in NEIGHBOUR_OFFSETS:
+            dist = shifted(d_row, d_col)
+            if d_row and d_col:  # no cutting corners past blocked tiles
+                open_corner = (shifted(d_row, 0) != UNREACHED) & (shifted(0, d_col) != UNREACHED)
+                dist = np.where(open_corner, dist, UNREACHED)
+            candidates.append(dist)
+        candidates = np.stack(candidates)
+        best = candidates.argmin(axis=0)
+        descends = np.take_along_axis(candidates, best[None], axis=0)[0] < shifted(0, 0)
+        self.dir_x[row0:row1, col0:col1] = np.where(descends, NEIGHBOUR_DIRS[best, 0], 0)
+        self.dir_y[row0:row1, col0:col1] = np.where(descends, NEIGHBOUR_DIRS[best, 1], 0)
+
+    def recompute(self, cell):
+        self.distance[:] = self._bfs(cell, 0, self.rows, 0, self.cols)
+        self._update_directions(0, self.rows, 0, self.cols)
+        self.full_target = cell
+        self.full_recomputes += 1
+
+    def update_around(self, cell):
+        """Refreshes a window around the target after a one tile step.
+
+        The target only moved to a neighbour tile, so old distances plus the
+        old distance of that tile, 1 for a side and 2 for a diagonal step,
+        are upper bounds of the new ones everywhere. Tiles outside the window
+        keep those bounds and their directions, the window is solved exactly
+        from the target and from its border, which keeps every direction
+        strictly descending. Far tiles get stale as the target keeps walking,
+        FLOW_MAX_DRIFT bounds that with a full rebuild.
+        """
+        step = int(self.distance[cell])
+        if step > 2:
+            # A diagonal step past two blocked tiles, the way round may leave the window
+            self.recompute(cell)
+            return
+        reached = self.distance != UNREACHED
+        self.distance[reached] += step
+        radius = self.update_radius
+        row0, row1 = max(cell[0] - radius, 0), min(cell[0] + radius + 1, self.rows)
+        col0, col1 = max(cell[1] - radius, 0), min(cell[1] + radius + 1, self.cols)
+        height, width = row1 - row0, col1 - col0
+        ring = self._distance[row0 : row1 + 2, col0 : col1 + 2].astype(np.int64)
+        walkable = self.walkable[row0:row1, col0:col1].tolist()
+
+        initial = np.full((height, width), UNREACHED, dtype=np.int64)
+        initial[0, :] = np.minimum(initial[0, :], ring[0, 1:-1] + 1)
+        initial[-1, :] = np.minimum(initial[-1, :], ring[-1, 1:-1] + 1)
+        initial[:, 0] = np.minimum(initial[:, 0], ring[1:-1, 0] + 1)
+        initial[:, -1] = np.minimum(initial[:, -1], ring[1:-1, -1] + 1)
+        initial = initial.tolist()
+        dist = [[UNREACHED] * width for _ in range(height)]
+        heap = [
+            (value, row, col)
+            for row in (0, height - 1)
+            for col, value in enumerate(initial[row])
+            if value < UNREACHED and walkable[row][col]
+        ]
+        heap += [
+            (initial[row][col], row, col)
+            for row in range(1, height - 1)
+            for col in (0, width - 1)
+            if initial[row][col] < UNREACHED and walkable[row][col]
+        ]
+        heap.append((0, cell[0] - row0, cell[1] - col0))
+        heapq.heapify(heap)
+        while heap:
+            value, row, col = heapq.heappop(heap)
+            if value >= dist[row][col]:
+                continue
+            dist[row][col] = value
+            for n_row, n_col in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+                if (
+                    0 <= n_row < height
+                    and 0 <= n_col < width
+                    and walkable[n_row][n_col]
+                    and value + 1 < dist[n_row][n_col]
+                ):
+                    heapq.heappush(heap, (value + 1, n_row, n_col))
+        self.distance[row0:row1, col0:col1] = np.array(dist, dtype=np.int32)
+        self._update_directions(
+            max(row0 - 1, 0), min(row1 + 1, self.rows), max(col0 - 1, 0), min(col1 + 1, self.cols)
+        )
+        self.partial_updates += 1
+
+    def sample(self, x, y):
+        """Unit directions towards the target for arrays of positions, zero where
+        the field has none (target tile, unreachable tiles, outside the map)"""
+        col = np.floor(x / self.tile_width).astype(np.int64)
+        row = np.floor(y / self.tile_height).astype(np.int64)
+        inside = (row >= 0) & (row < self.rows) & (col >= 0) & (col < self.cols)
+        row = np.where(inside, row, 0)
+        col = np.where(inside, col, 0)
+        return (
+            np.where(inside, self.dir_x[row, col], 0),
+            np.where(inside, self.dir_y[row, col], 0),
+        )
@@ -0,0 +1,190 @@
+from contextlib import nullcontext
+from time import perf_counter
+
+import arcade
+import numpy as np
+
+
+FRAME_SECTIONS = (
+    "update_enemies",
+    "process_keychange",
+    "physics",
+    "scene_draw",
+    "enemies_draw",
+    "hp_bars",
+    "effects",
+    "npc",
+    "gotos",
+    "hud",
+)
+SECTION_COLORS = (
+    arcade.color.RED,
+    arcade.color.ORANGE,
+    arcade.color.YELLOW,
+    arcade.color.GREEN,
+    arcade.color.CYAN,
+    arcade.color.BLUE,
+    arcade.color.VIOLET,
+    arcade.color.PINK,
+    arcade.color.BROWN,
+    arcade.color.WHITE,
+)
+OTHER_COLOR = arcade.color.GRAY
+FRAME_HISTORY = 240  # frames kept in the ring buffer
+PERCENTILES = (50, 95, 99)
+NULL_SCOPE = nullcontext()
+
+OVERLAY_MARGIN = 10
+OVERLAY_LINE_HEIGHT = 16
+OVERLAY_FONT_SIZE = 10
+GRAPH_BAR_WIDTH = 2
+GRAPH_MS_HEIGHT = 4  # pixels per millisecond
+GRAPH_MAX_MS = 50
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class _Scope:
+    __slots__ = ("totals", "index", "start")
+
+    def __init__(self, totals, index):
+        self.totals = totals
+        self.index = index
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.totals[self.index] += perf_counter() - self.start
+
+
+class FrameTimer:
+    """Per-frame time spent in named sections, kept for the last frames.
+
+    ``scope(name)`` hands out a shared no-op context manager while disabled,
+    so instrumented code costs a method call when nobody is looking.
+    A frame lasts from one ``begin_frame`` to the next.
+    """
+
+    def __init__(self, sections=FRAME_SECTIONS, history=FRAME_HISTORY):
+        self.sections = sections
+        self.enabled = False
+        self.totals = [0.0] * len(sections)
+        self._scopes = {name: _Scope(self.totals, i) for i, name in enumerate(sections)}
+        # Milliseconds per section, the last column is the whole frame
+        self.samples = np.zeros((history, len(sections) + 1))
+        self.head = 0
+        self.filled = 0
+        self._frame_start = None
+
+    def scope(self, name):
+        if not self.enabled:
+            return NULL_SCOPE
+        return self._scopes[name]
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.head = 0
+        self.filled = 0
+        self._frame_start = None
+        self.totals[:] = [0.0] * len(self.sections)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = perf_counter()
+        if self._frame_start is not None:
+            row = self.samples[self.head]
+            row[:-1] = self.totals
+            row[-1] = now - self._frame_start
+            row *= 1000
+            self.head = (self.head + 1) % len(self.samples)
+            self.filled = min(self.filled + 1, len(self.samples))
+        self.totals[:] = [0.0] * len(self.sections)
+        self._frame_start = now
+
+    def recent(self):
+        """Rows of the kept frames, oldest first"""
+        if self.filled < len(self.samples):
+            return self.samples[: self.filled]
+        return np.roll(self.samples, -self.head, axis=0)
+
+    def percentiles(self, qs=PERCENTILES):
+        """(len(qs), sections + 1) milliseconds, None before the first frame"""
+        if not self.filled:
+            return None
+        return np.percentile(self.recent(), qs, axis=0)
+
+
+class FrameTimingOverlay:
+    """Live percentiles and a stacked frame time graph of a FrameTimer, drawn
+    in screen space at the bottom right of the camera"""
+
+    def __init__(self, timer: FrameTimer):
+        self.timer = timer
+        self.names = ("frame",) + timer.sections
+        self.lines = None  # pyglet text needs a display, made on the first draw
+
+    def _graph(self, left, bottom):
+        recent = self.timer.recent()
+        points = []
+        colors = []
+        colors_per_section = SECTION_COLORS + (OTHER_COLOR,)
+        for i, row in enumerate(recent):
+            x0 = left + i * GRAPH_BAR_WIDTH
+            x1 = x0 + GRAPH_BAR_WIDTH
+            sections = row[:-1].tolist()
+            # Whatever the sections do not cover stacks on top as "other"
+            sections.append(max(row[-1] - sum(sections), 0))
+            y = 0.0
+            for ms, color in zip(sections, colors_per_section):
+                if ms <= 0 or y >= GRAPH_MAX_MS:
+                    continue
+                top = min(y + ms, GRAPH_MAX_MS)
+                y0 = bottom + y * GRAPH_MS_HEIGHT
+                y1 = bottom + top * GRAPH_MS_HEIGHT
+                points += [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+                colors += [color] * 4
+                y = top
+        if points:
+            arcade.create_rectangles_filled_with_colors(points, colors).draw()
+        budget_y = bottom + FRAME_BUDGET_MS * GRAPH_MS_HEIGHT
+        right = left + len(self.timer.samples) * GRAPH_BAR_WIDTH
+        arcade.draw_line(left, budget_y, right, budget_y, arcade.color.WHITE)
+
+    def draw(self, camera):
+        if self.lines is None:
+            self.lines = [
+                arcade.Text(
+                    "", 0, 0, arcade.color.WHITE, OVERLAY_FONT_SIZE, font_name="monospace"
+                )
+                for _ in range(len(self.names) + 1)
+            ]
+        width = len(self.timer.samples) * GRAPH_BAR_WIDTH
+        height = GRAPH_MAX_MS * GRAPH_MS_HEIGHT + OVERLAY_LINE_HEIGHT * len(self.lines)
+        left = camera.position.x + camera.viewport_width - width - OVERLAY_MARGIN
+        bottom = camera.position.y + OVERLAY_MARGIN
+        arcade.draw_lrtb_rectangle_filled(
+            left - OVERLAY_MARGIN,
+            left + width + OVERLAY_MARGIN,
+            bottom + height + OVERLAY_MARGIN,
+            bottom - OVERLAY_MARGIN,
+            (0, 0, 0, 180),
+        )
+        self._graph(left, bottom)
+
+        stats = self.timer.percentiles()
+        text_y = (
+            bottom + GRAPH_MAX_MS * GRAPH_MS_HEIGHT + OVERLAY_LINE_HEIGHT * len(self.names)
+        )
+        header = self.lines[0]
+        header.text = f"{'ms':18}" + "".join(f"{f'p{q}':>8}" for q in PERCENTILES)
+        header.x, header.y = left, text_y
+        header.draw()
+        for i, (line, name) in enumerate(zip(self.lines[1:], self.names)):
+            column = -1 if i == 0 else i - 1
+            values = "" if stats is None else "".join(f"{v:8.2f}" for v in stats[:, column])
+            line.text = f"{name:18}{values}"
+            line.color = arcade.color.WHITE if i == 0 else SECTION_COLORS[i - 1]
+            line.x, line.y = left, text_y - (i + 1) * OVERLAY_LINE_HEIGHT
+            line.draw()
@@ -0,0 +1,117 @@
+from time import perf_counter
+
+import arcade
+from arcade.experimental.shadertoy import Shadertoy
+from pyglet.math import Vec2
+
+from engine.sim_clock import SIM_TICK
+
+
+def is_headless(window):
+    return getattr(window, "headless", False)
+
+
+class NullProgram(dict):
+    """Swallows uniform assignments"""
+
+
+class NullShadertoy:
+    def __init__(self, size=(0, 0)):
+        self.size = size
+        self.program = NullProgram()
+
+    def render(self, *args, **kwargs):
+        pass
+
+
+def create_shadertoy(window, path):
+    """Shadertoy from a shader file, a no-op stand-in when there is no GL context"""
+    if is_headless(window):
+        return NullShadertoy(window.get_size())
+    return Shadertoy.create_from_file(window.get_size(), path)
+
+
+def create_program(window, vertex_shader, fragment_shader):
+    """Shader program from shader files, a no-op stand-in when there is no GL context"""
+    if is_headless(window):
+        return NullProgram()
+    return window.ctx.load_program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+
+
+class HeadlessCamera:
+    """The parts of arcade.Camera gameplay code reads, without projection matrices"""
+
+    def __init__(self, viewport_width, viewport_height):
+        self.viewport_width = viewport_width
+        self.viewport_height = viewport_height
+        self.position = Vec2(0, 0)
+
+    def move_to(self, vector, speed=1.0):
+        self.position = Vec2(*vector)
+
+    def use(self):
+        pass
+
+
+class HeadlessWindow:
+    """Stand-in for arcade.Window that drives views' on_update as fast as the
+    CPU allows and never draws. Registers itself as arcade's current window,
+    views and cameras look it up on construction."""
+
+    headless = True
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.current_view = None
+        self.running = False
+        self.handlers = []  # (event name, handler) pushed below the views
+        arcade.set_window(self)
+
+    def get_size(self):
+        return self.width, self.height
+
+    def show_view(self, view):
+        if self.current_view is not None:
+            self.current_view.on_hide_view()
+        self.current_view = view
+        view.on_show_view()
+
+    def close(self):
+        self.running = False
+        self.current_view = None
+
+    def push_handlers(self, *handlers):
+        self.handlers += [(handler.__name__, handler) for handler in handlers]
+
+    def _dispatch(self, event, *args):
+        for name, handler in self.handlers:
+            if name == event:
+                handler(*args)
+
+    def on_key_press(self, symbol, modifiers):
+        if self.current_view is not None:
+            self.current_view.on_key_press(symbol, modifiers)
+        self._dispatch("on_key_press", symbol, modifiers)
+
+    def on_key_release(self, symbol, modifiers):
+        if self.current_view is not None:
+            self.current_view.on_key_release(symbol, modifiers)
+        self._dispatch("on_key_release", symbol, modifiers)
+
+    def update(self, frame_time):
+        """One frame of frame_time seconds, as the event loop would run it"""
+        self.current_view.on_update(frame_time)
+        self._dispatch("on_update", frame_time)
+
+    def run(self, frames, frame_time=SIM_TICK):
+        """Updates the current view for at most the given number of frames of
+        frame_time each, returns (frames run, wall seconds spent)"""
+        self.running = True
+        done = 0
+        start = perf_counter()
+        while self.running and done < frames:
+            self.update(frame_time)
+            done += 1
+        self.running = False
+        return done, perf_counter() - start
@@ -0,0 +1,142 @@
+from hashlib import blake2b
+from os import stat
+from os.path import abspath, exists, join, relpath
+import json
+
+import arcade
+
+
+HIT_BOX_CACHE_PATH = join("textures", "hitboxes.json")
+HIT_BOX_CACHE_VERSION = 2
+# Entities collide with the polygon traced around the opaque pixels
+SPRITE_HIT_BOX_ALGORITHM = "Detailed"
+DEFAULT_HIT_BOX_DETAIL = 4.5  # arcade's default
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return blake2b(f.read(), digest_size=16).hexdigest()
+
+
+class HitBoxCache:
+    """Hit box polygons of sprite textures kept between launches.
+
+    Entries are keyed by texture file, sub-rectangle and hit box algorithm
+    with its detail, and dropped once the file's content hash changes. A
+    file is only hashed again when its size or modification time moved.
+    arcade computes hit boxes lazily, so only the polygons some sprite
+    actually asked for are stored: ``apply`` installs cached ones and
+    remembers the rest, ``save`` collects those computed since.
+    """
+
+    def __init__(self, path=HIT_BOX_CACHE_PATH):
+        self.path = path
+        self.hashes = {}  # file: [size, modification time ns, content hash]
+        self.hit_boxes = {}  # key: points
+        self.dirty = False
+        self._checked = set()  # files hashed this run
+        self._pending = {}  # key: texture without a cached polygon yet
+        if exists(path):
+            with open(path) as cache_file:
+                data = json.load(cache_file)
+            if data["version"] == HIT_BOX_CACHE_VERSION:
+                self.hashes = data["hashes"]
+                self.hit_boxes = data["hit_boxes"]
+
+    def _check(self, name):
+        if name in self._checked:
+            return
+        self._checked.add(name)
+        file_stat = stat(name)
+        known = self.hashes.get(name)
+        if known is not None and known[:2] == [file_stat.st_size, file_stat.st_mtime_ns]:
+            return
+        content_hash = file_hash(name)
+        if known is None or known[2] != content_hash:
+            prefix = name + "|"
+            self.hit_boxes = {
+                key: points
+                for key, points in self.hit_boxes.items()
+                if not key.startswith(prefix)
+            }
+        self.hashes[name] = [file_stat.st_size, file_stat.st_mtime_ns, content_hash]
+        self.dirty = True
+
+    def apply(self, texture, file_name, region, algorithm, detail):
+        if texture._hit_box_points is not None:
+            return
+        name = relpath(abspath(file_name)).replace("\\", "/")
+        self._check(name)
+        key = f"{name}|{','.join(map(str, region))}|{algorithm}|{detail}"
+        points = self.hit_boxes.get(key)
+        if points is None:
+            self._pending[key] = texture
+        else:
+            texture._hit_box_points = tuple(tuple(point) for point in points)
+
+    def save(self):
+        for key, texture in self._pending.items():
+            if texture._hit_box_points is not None:
+                self.hit_boxes[key] = [list(point) for point in texture._hit_box_points]
+                self.dirty = True
+        self._pending = {
+            key: texture
+            for key, texture in self._pending.items()
+            if texture._hit_box_points is None
+        }
+        if not self.dirty:
+            return
+        with open(self.path, "w") as cache_file:
+            json.dump(
+                {
+                    "version": HIT_BOX_CACHE_VERSION,
+                    "hashes": self.hashes,
+                    "hit_boxes": self.hit_boxes,
+                },
+                cache_file,
+                separators=(",", ":"),
+            )
+        self.dirty = False
+
+
+_hit_box_cache = None
+
+
+def get_hit_box_cache() -> HitBoxCache:
+    global _hit_box_cache
+    if _hit_box_cache is None:
+        _hit_box_cache = HitBoxCache()
+    return _hit_box_cache
+
+
+def save_hit_box_cache():
+    if _hit_box_cache is not None:
+        _hit_box_cache.save()
+
+
+def load_texture(
+    file_name,
+    x=0,
+    y=0,
+    width=0,
+    height=0,
+    hit_box_algorithm=SPRITE_HIT_BOX_ALGORITHM,
+    hit_box_detail=DEFAULT_HIT_BOX_DETAIL,
+    **kwargs,
+):
+    """arcade.load_texture for sprite textures, with the Detailed hit box
+    taken from the persistent cache when it has one"""
+    texture = arcade.load_texture(
+        file_name,
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        hit_box_algorithm=hit_box_algorithm,
+        hit_box_detail=hit_box_detail,
+        **kwargs,
+    )
+    # Flips and other options change the polygon as much as the rectangle does
+    region = (x, y, width, height, *sorted(kwargs.items()))
+    get_hit_box_cache().apply(texture, file_name, region, hit_box_algorithm, hit_box_detail)
+    return texture
@@ -0,0 +1,191 @@
+from time import perf_counter, strftime
+import gc
+import json
+
+import arcade
+
+from engine.enemy_sim import totals as enemy_totals
+
+
+HITCH_BUDGET_MS = 1000 / 30  # frames slower than this are logged
+HITCH_LOG = "hitches.log"
+GC_FREEZE = "freeze"  # move everything alive after setup out of the collector's sight
+GC_MANUAL = "manual"  # no automatic collections, collect in quiet frames instead
+GC_MODES = (GC_FREEZE, GC_MANUAL)
+QUIET_FRAME_FRACTION = 0.5  # of the budget, frames faster than this may collect
+MANUAL_GC_MAX_DEFER = 10  # thresholds worth of allocations a collection may wait for
+
+
+class HitchDetector:
+    """Logs frames over budget together with what happened during them.
+
+    Frames are measured between ``on_update`` calls, so a frame includes
+    the draw before it. Besides garbage collections, which come from
+    ``gc.callbacks``, every probe is a callable returning a running total;
+    its change over the frame is logged.
+    """
+
+    def __init__(self, window, probes=None, budget_ms=HITCH_BUDGET_MS, log_path=HITCH_LOG):
+        self.window = window
+        self.probes = probes or {}
+        self.budget_ms = budget_ms
+        self.log_path = log_path
+        self.frame = 0
+        self.hitches = 0
+        self.last_frame_ms = 0.0
+        self._collections = []
+        self._gc_start = None
+        self._frame_start = None
+        self._totals = {}
+        self._view = None
+        self._log = None
+
+    def start(self):
+        gc.callbacks.append(self._on_gc)
+        self._log = open(self.log_path, "a")
+        self._totals = {name: probe() for name, probe in self.probes.items()}
+        self._view = self.window.current_view
+
+    def stop(self):
+        gc.callbacks.remove(self._on_gc)
+        self._log.close()
+        self._log = None
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = perf_counter()
+        elif self._gc_start is not None:
+            self._collections.append(
+                {
+                    "generation": info["generation"],
+                    "ms": round((perf_counter() - self._gc_start) * 1000, 3),
+                    "collected": info["collected"],
+                }
+            )
+            self._gc_start = None
+
+    def on_update(self, delta_time):
+        now = perf_counter()
+        totals = {name: probe() for name, probe in self.probes.items()}
+        view = self.window.current_view
+        if self._frame_start is not None:
+            self.last_frame_ms = (now - self._frame_start) * 1000
+            if self.last_frame_ms > self.budget_ms:
+                self._write(totals, view)
+        self.frame += 1
+        self._frame_start = now
+        self._collections = []
+        self._totals = totals
+        self._view = view
+
+    def _write(self, totals, view):
+        self.hitches += 1
+        record = {
+            "time": strftime("%H:%M:%S"),
+            "frame": self.frame,
+            "ms": round(self.last_frame_ms, 3),
+            "budget_ms": round(self.budget_ms, 3),
+            "view": type(view).__name__,
+            "gc": self._collections,
+            "gc_ms": round(sum(c["ms"] for c in self._collections), 3),
+        }
+        for name, total in totals.items():
+            record[name] = total - self._totals.get(name, total)
+        if view is not self._view:
+            record["view_switch"] = type(self._view).__name__
+        self._log.write(json.dumps(record) + "\n")
+        self._log.flush()
+
+
+class GcTuner:
+    """Opt-in garbage collector modes, see GC_MODES. In manual mode its
+    ``on_update`` has to be pushed on the window to collect at all."""
+
+    def __init__(self, modes=(), budget_ms=HITCH_BUDGET_MS):
+        unknown = set(modes) - set(GC_MODES)
+        if unknown:
+            raise ValueError(f"unknown gc modes {sorted(unknown)}")
+        self.modes = set(modes)
+        self.budget_ms = budget_ms
+        self.collections = 0
+        self._frame_start = None
+
+    @property
+    def manual(self):
+        return GC_MANUAL in self.modes
+
+    def start(self):
+        if self.manual:
+            gc.disable()
+
+    def stop(self):
+        if self.manual:
+            gc.enable()
+
+    def after_setup(self):
+        if GC_FREEZE in self.modes:
+            gc.collect()
+            gc.freeze()
+
+    def on_update(self, delta_time):
+        now = perf_counter()
+        frame_ms = 0.0 if self._frame_start is None else (now - self._frame_start) * 1000
+        self._frame_start = now
+        self.collect_if_quiet(frame_ms)
+
+    def collect_if_quiet(self, frame_ms):
+        """Runs the collection the collector would have run by now if the last
+        frame left time to spare or it has been put off for too long"""
+        counts = gc.get_count()
+        thresholds = gc.get_threshold()
+        if counts[0] < thresholds[0]:
+            return
+        overdue = counts[0] >= thresholds[0] * MANUAL_GC_MAX_DEFER
+        if frame_ms > self.budget_ms * QUIET_FRAME_FRACTION and not overdue:
+            return
+        generation = 0
+        for gen in (1, 2):
+            if counts[gen] >= thresholds[gen]:
+                generation = gen
+        gc.collect(generation)
+        self.collections += 1
+
+
+_gc_tuner = GcTuner()
+
+
+def set_gc_tuner(tuner: GcTuner):
+    global _gc_tuner
+    _gc_tuner = tuner
+
+
+def get_gc_tuner() -> GcTuner:
+    return _gc_tuner
+
+
+_hitch_detector = None
+
+
+def start_hitch_detector(window, budget_ms=HITCH_BUDGET_MS, log_path=HITCH_LOG):
+    global _hitch_detector
+    probes = {
+        "enemies_added": lambda: enemy_totals["added"],
+        "enemies_removed": lambda: enemy_totals["removed"],
+        "textures_loaded": lambda: len(arcade.load_texture.texture_cache),
+    }
+    _hitch_detector = HitchDetector(window, probes, budget_ms, log_path)
+    _hitch_detector.start()
+    window.push_handlers(_hitch_detector.on_update)
+    return _hitch_detector
+
+
+def stop_hitch_detector():
+    global _hitch_detector
+    detector, _hitch_detector = _hitch_detector, None
+    if detector is None:
+        return
+    detector.stop()
+    print(
+        f"hitch detector: {detector.hitches} of {detector.frame} frames over "
+        f"{detector.budget_ms:.1f} ms -> {detector.log_path}"
+    )
@@ -0,0 +1,99 @@
+import arcade
+from arcade.gl import BufferDescription
+import numpy as np
+
+from entities.enemy import HP_BAR_HEALTH_GRADIENT, HP_BAR_HEIGHT, HP_BAR_WIDTH
+
+
+HP_BAR_BACKGROUND_COLOR = arcade.color.DARK_GREEN
+VERTICES_PER_BAR = 12  # two quads of two triangles
+INITIAL_BARS = 256
+# Corners of the two triangles of a quad, in units of its half size
+QUAD_CORNERS = np.array(
+    [(-1, -1), (1, -1), (1, 1), (-1, -1), (1, 1), (-1, 1)], dtype=np.float32
+)
+
+
+def rgba(color):
+    return tuple(color) + (255,) * (4 - len(color))
+
+
+class HpBarRenderer:
+    """HP bars of many enemies in one draw call.
+
+    Every frame the bar quads of the given enemies are built with NumPy
+    and written to a vertex buffer kept between frames, which doubles in
+    size when it runs out of room. GL objects are made on the first draw.
+    """
+
+    def __init__(self, gradient=HP_BAR_HEALTH_GRADIENT):
+        self.gradient = np.array([rgba(color) for color in gradient], dtype=np.uint8)
+        self.background = np.array(rgba(HP_BAR_BACKGROUND_COLOR), dtype=np.uint8)
+        self.capacity = 0
+        self.ctx = None
+        self.vertices = None
+        self.colors = None
+        self.geometry = None
+
+    def _reserve(self, bars):
+        if bars <= self.capacity:
+            return
+        capacity = max(self.capacity, INITIAL_BARS)
+        while capacity < bars:
+            capacity *= 2
+        vertices = capacity * VERTICES_PER_BAR
+        if self.ctx is None:
+            self.ctx = arcade.get_window().ctx
+            self.vertices = self.ctx.buffer(reserve=vertices * 2 * 4)
+            self.colors = self.ctx.buffer(reserve=vertices * 4)
+            self.geometry = self.ctx.geometry(
+                [
+                    BufferDescription(self.vertices, "2f", ["in_vert"]),
+                    BufferDescription(self.colors, "4f1", ["in_color"], normalized=["in_color"]),
+                ]
+            )
+        else:
+            self.vertices.orphan(vertices * 2 * 4)
+            self.colors.orphan(vertices * 4)
+        self.capacity = capacity
+
+    def build(self, x, top, hitpoints, max_hitpoints):
+        """(vertices, colors) of the bars, two quads per enemy: the background,
+        then the health left on top of it"""
+        n = len(x)
+        pos_y = top + HP_BAR_HEIGHT // 2
+        fill = (HP_BAR_WIDTH * hitpoints / max_hitpoints).astype(np.int64)
+        # Same pick as get_color_from_gradient, -1 included
+        shade = np.ceil(hitpoints / max_hitpoints * len(self.gradient)).astype(np.int64) - 1
+        shade = np.minimum(shade, len(self.gradient) - 1)
+
+        centers = np.empty((n, 2, 2), dtype=np.float32)
+        centers[:, 0, 0] = x
+        centers[:, 1, 0] = x + (fill - HP_BAR_WIDTH) / 2
+        centers[:, :, 1] = pos_y[:, None]
+        half_sizes = np.empty((n, 2, 2), dtype=np.float32)
+        half_sizes[:, 0, 0] = HP_BAR_WIDTH / 2
+        half_sizes[:, 1, 0] = fill / 2
+        half_sizes[:, :, 1] = HP_BAR_HEIGHT / 2
+        vertices = centers[:, :, None, :] + QUAD_CORNERS[None, None] * half_sizes[:, :, None, :]
+
+        colors = np.empty((n, 2, len(QUAD_CORNERS), 4), dtype=np.uint8)
+        colors[:, 0] = self.background
+        colors[:, 1] = self.gradient[shade][:, None]
+        return vertices.reshape(-1, 2), colors.reshape(-1, 4)
+
+    def draw(self, enemies):
+        bars = np.array(
+            [(enemy.center_x, enemy.top, enemy.hitpoints, enemy.max_hitpoints) for enemy in enemies],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        bars = bars[bars[:, 2] >= 0]
+        if not len(bars):
+            return
+        vertices, colors = self.build(*bars.T)
+        self._reserve(len(bars))
+        self.vertices.write(vertices.tobytes())
+        self.colors.write(colors.tobytes())
+        self.geometry.render(
+            self.ctx.line_vertex_shader, mode=self.ctx.TRIANGLES, vertices=len(vertices)
+        )
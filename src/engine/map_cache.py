@@ -0,0 +1,266 @@
+from os.path import abspath, basename, dirname, exists, getsize, join, splitext
+from tempfile import NamedTemporaryFile
+import json
+import os
+import struct
+
+import arcade
+import numpy as np
+
+from engine.collision import CollisionGrid
+from engine.hitbox_cache import file_hash
+from engine.tile_index import GID_MASK, TileIndex, load_layer_gids
+
+
+MAP_CACHE_VERSION = 1
+MAP_CACHE_EXT = ".mapc"
+MAP_CACHE_MAGIC = b"MAPC"
+MAP_CACHE_ALIGN = 64  # array offsets are aligned for the memory map
+HEADER = struct.Struct("<4sIQ")  # magic, version, metadata length
+
+FLIPPED_HORIZONTALLY = 0x80000000
+FLIPPED_VERTICALLY = 0x40000000
+FLIPPED_DIAGONALLY = 0x20000000
+
+
+def map_cache_path(path):
+    return splitext(path)[0] + MAP_CACHE_EXT
+
+
+def _tile_region(tileset, local_id, map_dir):
+    """(image file, x, y, width, height) the way arcade's tilemap resolves it"""
+    if "image" in tileset:
+        margin = tileset.get("margin", 0)
+        spacing = tileset.get("spacing", 0)
+        col, row = local_id % tileset["columns"], local_id // tileset["columns"]
+        return (
+            join(map_dir, tileset["image"]),
+            margin + col * (tileset["tilewidth"] + spacing),
+            margin + row * (tileset["tileheight"] + spacing),
+            tileset["tilewidth"],
+            tileset["tileheight"],
+        )
+    for tile in tileset.get("tiles", ()):
+        if tile["id"] == local_id:
+            return (
+                join(map_dir, tile["image"]),
+                tile.get("x", 0),
+                tile.get("y", 0),
+                tile.get("width", tile["imagewidth"]),
+                tile.get("height", tile["imageheight"]),
+            )
+    raise ValueError(f"no image for tile {local_id} of tileset {tileset['name']}")
+
+
+def resolve_tile(tilesets, raw_gid, map_dir):
+    """Texture description of a raw gid, flip flags included"""
+    gid = raw_gid & GID_MASK
+    tileset = None
+    for candidate in tilesets:
+        if candidate["firstgid"] <= gid:
+            tileset = candidate
+    if tileset is None:
+        raise ValueError(f"no tileset for gid {gid}")
+    local_id = gid - tileset["firstgid"]
+    image, x, y, width, height = _tile_region(tileset, local_id, map_dir)
+    tile = {
+        "image": image,
+        "region": [x, y, width, height],
+        "flipped_horizontally": bool(raw_gid & FLIPPED_HORIZONTALLY),
+        "flipped_vertically": bool(raw_gid & FLIPPED_VERTICALLY),
+        "flipped_diagonally": bool(raw_gid & FLIPPED_DIAGONALLY),
+    }
+    # Like arcade, animations only play for tiles of image collection tilesets
+    for entry in () if "image" in tileset else tileset.get("tiles", ()):
+        if entry["id"] == local_id and "animation" in entry:
+            tile["animation"] = [
+                [frame["tileid"], frame["duration"], *_tile_region(tileset, frame["tileid"], map_dir)]
+                for frame in entry["animation"]
+            ]
+    return tile
+
+
+def compile_map(path, out_path):
+    """Writes the tile layers of a Tiled JSON map, the textures their gids
+    resolve to and the derived walkability and collision grids to out_path.
+    The file is written aside and moved in place whole, a crash or a second
+    writer never leaves a partial cache behind."""
+    with open(path) as map_file:
+        map_json = json.load(map_file)
+    map_dir = dirname(abspath(path))
+    tilesets = sorted(map_json["tilesets"], key=lambda tileset: tileset["firstgid"])
+    raw_layers = load_layer_gids(map_json, keep_flags=True)
+    tile_width, tile_height = map_json["tilewidth"], map_json["tileheight"]
+    tile_index = TileIndex.from_layers(
+        {name: gids & GID_MASK for name, gids in raw_layers.items()}, tile_width, tile_height
+    )
+    collision = CollisionGrid.from_json(map_json, map_dir)
+
+    arrays = {
+        "gids": np.stack(list(raw_layers.values())),
+        "walkable": tile_index.walkable,
+        "solid": collision.solid,
+        "boxes": np.stack(
+            (collision.box_x0, collision.box_y0, collision.box_x1, collision.box_y1)
+        ),
+    }
+    used = np.unique(arrays["gids"])
+    layers = [
+        {"name": layer["name"], "visible": layer["visible"], "opacity": layer["opacity"]}
+        for layer in map_json["layers"]
+        if layer["type"] == "tilelayer"
+    ]
+    meta = {
+        "source_hash": file_hash(path),
+        "width": map_json["width"],
+        "height": map_json["height"],
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "layers": layers,
+        "tiles": {
+            str(raw_gid): resolve_tile(tilesets, raw_gid, map_dir)
+            for raw_gid in used.tolist()
+            if raw_gid & GID_MASK
+        },
+        "arrays": {},
+    }
+    # Offsets are relative to the end of the metadata, padded to alignment
+    offset = 0
+    for name, arr in arrays.items():
+        meta["arrays"][name] = {"dtype": arr.dtype.str, "shape": arr.shape, "offset": offset}
+        offset += -(-arr.nbytes // MAP_CACHE_ALIGN) * MAP_CACHE_ALIGN
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+    data_start = -(-(HEADER.size + len(meta_bytes)) // MAP_CACHE_ALIGN) * MAP_CACHE_ALIGN
+    out_dir = dirname(abspath(out_path))
+    with NamedTemporaryFile(
+        "wb", dir=out_dir, prefix=basename(out_path) + ".", suffix=".tmp", delete=False
+    ) as out:
+        try:
+            out.write(HEADER.pack(MAP_CACHE_MAGIC, MAP_CACHE_VERSION, len(meta_bytes)))
+            out.write(meta_bytes)
+            for name, arr in arrays.items():
+                out.seek(data_start + meta["arrays"][name]["offset"])
+                out.write(np.ascontiguousarray(arr).tobytes())
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    os.replace(out.name, out_path)
+
+
+def _read_meta(path):
+    """(metadata, data start) of a map cache, (None, 0) when it is of another
+    version, unreadable or shorter than its arrays"""
+    try:
+        with open(path, "rb") as cache_file:
+            magic, version, length = HEADER.unpack(cache_file.read(HEADER.size))
+            if magic != MAP_CACHE_MAGIC or version != MAP_CACHE_VERSION:
+                return None, 0
+            meta = json.loads(cache_file.read(length))
+        data_start = -(-(HEADER.size + length) // MAP_CACHE_ALIGN) * MAP_CACHE_ALIGN
+        end = max(
+            data_start
+            + info["offset"]
+            + int(np.prod(info["shape"])) * np.dtype(info["dtype"]).itemsize
+            for info in meta["arrays"].values()
+        )
+        if getsize(path) < end:
+            return None, 0
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None, 0
+    return meta, data_start
+
+
+class CompiledMap:
+    """Memory-mapped compiled form of a Tiled map.
+
+    Mirrors the attributes of arcade's TileMap the game reads and builds
+    the same tile sprites, minus tile properties, tile hit boxes and layer
+    offsets or tints, which nothing here uses. Layer arrays have row 0 at
+    the bottom of the world, like TileIndex.
+    """
+
+    def __init__(self, path, meta, data_start):
+        self.path = path
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.tile_width = meta["tile_width"]
+        self.tile_height = meta["tile_height"]
+        self.layers = meta["layers"]
+        self.tiles = {int(raw_gid): tile for raw_gid, tile in meta["tiles"].items()}
+        for name, info in meta["arrays"].items():
+            arr = np.memmap(
+                path,
+                dtype=np.dtype(info["dtype"]),
+                mode="r",
+                offset=data_start + info["offset"],
+                shape=tuple(info["shape"]),
+            )
+            # Plain ndarray views of the mapping, memmap slicing is slower in hot paths
+            setattr(self, name, np.asarray(arr))
+
+    @classmethod
+    def load(cls, path):
+        """Compiled map of the Tiled JSON at path, compiled again when the JSON changed"""
+        cache_path = map_cache_path(path)
+        if exists(cache_path):
+            meta, data_start = _read_meta(cache_path)
+            if meta is not None and meta["source_hash"] == file_hash(path):
+                return cls(cache_path, meta, data_start)
+        compile_map(path, cache_path)
+        return cls(cache_path, *_read_meta(cache_path))
+
+    def tile_index(self):
+        return TileIndex(self.walkable, self.tile_width, self.tile_height)
+
+    def collision_grid(self):
+        return CollisionGrid(self.solid, tuple(self.boxes), self.tile_width, self.tile_height)
+
+    def _make_sprite(self, tile, textures):
+        if "animation" in tile:
+            frames = [
+                arcade.AnimationKeyframe(tile_id, duration, arcade.load_texture(*region))
+                for tile_id, duration, *region in tile["animation"]
+            ]
+            sprite = arcade.AnimatedTimeBasedSprite()
+            sprite.texture = frames[0].texture
+            sprite.frames = frames
+            return sprite
+        texture = textures.get(id(tile))
+        if texture is None:
+            texture = arcade.load_texture(
+                tile["image"],
+                *tile["region"],
+                flipped_horizontally=tile["flipped_horizontally"],
+                flipped_vertically=tile["flipped_vertically"],
+                flipped_diagonally=tile["flipped_diagonally"],
+                hit_box_algorithm="None",
+            )
+            textures[id(tile)] = texture
+        return arcade.Sprite(texture=texture)
+
+    def build_sprite_lists(self):
+        """{layer name: SpriteList}, sprites in the order arcade's tilemap adds them"""
+        sprite_lists = {}
+        textures = {}
+        for layer, gids in zip(self.layers, self.gids):
+            # Lazy lists create their GL buffers on the first draw, so any thread can build them
+            sprite_list = arcade.SpriteList(lazy=True)
+            sprite_list.visible = layer["visible"]
+            alpha = int(layer["opacity"] * 255) if layer["opacity"] else 255
+            # Top row first, left to right
+            top_down = np.asarray(gids)[::-1]
+            rows, cols = np.nonzero(top_down)
+            for row, col, raw_gid in zip(
+                (self.height - 1 - rows).tolist(), cols.tolist(), top_down[rows, cols].tolist()
+            ):
+                sprite = self._make_sprite(self.tiles[raw_gid], textures)
+                sprite.position = (
+                    col * self.tile_width + sprite.width / 2,
+                    row * self.tile_height + sprite.height / 2,
+                )
+                if alpha != 255:
+                    sprite.alpha = alpha
+                sprite_list.append(sprite)
+            sprite_lists[layer["name"]] = sprite_list
+        return sprite_lists
@@ -0,0 +1,156 @@
+from collections import Counter
+from os import makedirs
+from os.path import basename, join
+import json
+import sys
+import threading
+import time
+
+
+PROFILE_RATE = 200  # samples per second
+PROFILE_DIR = "profiles"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def current_view_name(window):
+    view = window.current_view
+    return "None" if view is None else type(view).__name__
+
+
+class SamplingProfiler:
+    """Samples the Python stack of one thread from a background thread.
+
+    Every sample is attributed to the label context() returns at that moment,
+    the current arcade view for the game. Identical stacks are counted rather
+    than stored, so memory grows with the number of distinct stacks only.
+    """
+
+    def __init__(self, context=lambda: "main", rate=PROFILE_RATE, thread_id=None):
+        self.context = context
+        self.interval = 1 / rate
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.counts = Counter()  # (label, stack root first): samples
+        self.frames = {}  # code object: frame name, shared by every stack
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        self._stop.clear()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed += time.perf_counter() - self.started
+
+    def _frame_name(self, code):
+        name = self.frames.get(code)
+        if name is None:
+            name = f"{code.co_name} ({basename(code.co_filename)}:{code.co_firstlineno})"
+            self.frames[code] = name
+        return name
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.counts[(self.context(), tuple(stack))] += 1
+
+    def write_collapsed(self, path):
+        """One "label;root;...;leaf count" line per distinct stack, the input
+        format of flamegraph.pl, speedscope and most flame graph viewers"""
+        with open(path, "w") as out:
+            for (label, stack), count in sorted(self.counts.items()):
+                out.write(";".join((label,) + stack) + f" {count}\n")
+
+    def write_speedscope(self, path):
+        """Speedscope file with one sampled profile per label"""
+        names = []
+        index = {}
+        profiles = {}
+        for (label, stack), count in self.counts.items():
+            ids = []
+            for name in stack:
+                if name not in index:
+                    index[name] = len(names)
+                    names.append(name)
+                ids.append(index[name])
+            profile = profiles.setdefault(label, {"samples": [], "weights": []})
+            profile["samples"].append(ids)
+            profile["weights"].append(count * self.interval)
+        document = {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": "stu_project_game",
+            "exporter": "engine.profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": name} for name in names]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": label,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(profile["weights"]),
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for label, profile in sorted(profiles.items())
+            ],
+        }
+        with open(path, "w") as out:
+            json.dump(document, out)
+
+    def save(self, directory=PROFILE_DIR):
+        """Writes both formats, returns their paths"""
+        makedirs(directory, exist_ok=True)
+        stem = join(directory, time.strftime("profile-%Y%m%d-%H%M%S"))
+        self.write_collapsed(stem + ".folded")
+        self.write_speedscope(stem + ".speedscope.json")
+        return stem + ".folded", stem + ".speedscope.json"
+
+
+_active_profiler = None
+
+
+def start_profiler(window, rate=PROFILE_RATE):
+    global _active_profiler
+    _active_profiler = SamplingProfiler(lambda: current_view_name(window), rate)
+    _active_profiler.start()
+    return _active_profiler
+
+
+def stop_profiler(directory=PROFILE_DIR):
+    """Stops the running profiler and saves its samples, returns the file paths"""
+    global _active_profiler
+    profiler, _active_profiler = _active_profiler, None
+    if profiler is None:
+        return None
+    profiler.stop()
+    paths = profiler.save(directory)
+    samples = sum(profiler.counts.values())
+    print(f"profiler: {samples} samples over {profiler.elapsed:.1f} s -> {', '.join(paths)}")
+    return paths
+
+
+def toggle_profiler(window, rate=PROFILE_RATE):
+    if _active_profiler is None:
+        start_profiler(window, rate)
+    else:
+        stop_profiler()
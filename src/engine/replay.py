@@ -0,0 +1,88 @@
+import json
+
+
+REPLAY_VERSION = 2
+KEY_PRESS = "on_key_press"
+KEY_RELEASE = "on_key_release"
+
+
+class InputRecorder:
+    """Window event handler logging key events and the time every frame fed
+    the views. Pushed below the views, it sees events they let through. The
+    upgrades the game started with go in the header."""
+
+    def __init__(self, seed, upgrades):
+        self.seed = seed
+        self.upgrades = upgrades
+        self.frame_times = []
+        self.events = []  # (frame, handler name, symbol, modifiers)
+
+    def attach(self, window):
+        window.push_handlers(self.on_key_press, self.on_key_release, self.on_update)
+
+    def on_key_press(self, symbol, modifiers):
+        self.events.append((len(self.frame_times), KEY_PRESS, symbol, modifiers))
+
+    def on_key_release(self, symbol, modifiers):
+        self.events.append((len(self.frame_times), KEY_RELEASE, symbol, modifiers))
+
+    def on_update(self, delta_time):
+        self.frame_times.append(delta_time)
+
+    def save(self, path):
+        with open(path, "w") as replay_file:
+            # json writes floats with repr, they load back bit for bit
+            json.dump(
+                {
+                    "version": REPLAY_VERSION,
+                    "seed": self.seed,
+                    "upgrades": self.upgrades,
+                    "frame_times": self.frame_times,
+                    "events": self.events,
+                },
+                replay_file,
+                separators=(",", ":"),
+            )
+
+
+class Replay:
+    def __init__(self, seed, upgrades, frame_times, events):
+        self.seed = seed
+        self.upgrades = upgrades
+        self.frame_times = frame_times
+        self.events = events
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as replay_file:
+            data = json.load(replay_file)
+        if data["version"] != REPLAY_VERSION:
+            raise ValueError(f"unsupported replay version {data['version']}")
+        return cls(
+            data["seed"],
+            data["upgrades"],
+            data["frame_times"],
+            [tuple(event) for event in data["events"]],
+        )
+
+    def __len__(self):
+        return len(self.frame_times)
+
+    def play(self, window, on_frame=None):
+        """Feeds the recorded events to window's current view frame by frame and
+        updates it with the recorded frame times, so the clock runs the same
+        ticks and interpolates the same. on_frame(delta_time) is called after
+        every frame, e.g. to draw. Returns the number of frames played."""
+        events = iter(self.events)
+        pending = next(events, None)
+        for frame, delta_time in enumerate(self.frame_times):
+            while pending is not None and pending[0] == frame:
+                if window.current_view is not None:
+                    getattr(window.current_view, pending[1])(pending[2], pending[3])
+                pending = next(events, None)
+            if window.current_view is None:
+                return frame
+            window.current_view.on_update(delta_time)
+            if on_frame is not None:
+                on_frame(delta_time)
+        return len(self.frame_times)
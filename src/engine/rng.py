@@ -0,0 +1,15 @@
+import random
+
+
+# Every gameplay random draw goes through rng. Each GameView reseeds it with
+# a seed taken from the base seed, so a run is reproducible from that seed.
+rng = random.Random()
+_seeds = random.Random()
+
+
+def set_base_seed(seed):
+    _seeds.seed(seed)
+
+
+def next_game_seed():
+    return _seeds.getrandbits(32)
@@ -0,0 +1,53 @@
+SIM_TICK = 1 / 60
+MAX_TICKS_PER_FRAME = 5  # catch-up limit, time beyond it is dropped instead of spiralling
+
+
+class SimClock:
+    """Fixed-timestep clock, frames feed real time in and get whole ticks out"""
+
+    def __init__(self, tick=SIM_TICK, max_ticks=MAX_TICKS_PER_FRAME):
+        self.tick = tick
+        self.max_ticks = max_ticks
+        self.ticks = 0
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    @property
+    def time(self):
+        return self.ticks * self.tick
+
+    @property
+    def alpha(self):
+        """How far the frame is between the last tick and the next one, for interpolation"""
+        return self.accumulator / self.tick
+
+    def advance(self, frame_time):
+        """Accumulates frame_time, returns how many ticks to simulate now"""
+        self.accumulator += frame_time
+        ticks = int(self.accumulator // self.tick)
+        if ticks > self.max_ticks:
+            self.dropped_time += (ticks - self.max_ticks) * self.tick
+            ticks = self.max_ticks
+        self.accumulator -= ticks * self.tick
+        self.accumulator = min(self.accumulator, self.tick)
+        return ticks
+
+    def step(self):
+        self.ticks += 1
+
+
+_active_clock = SimClock()
+
+
+def set_active_clock(clock: SimClock):
+    global _active_clock
+    _active_clock = clock
+
+
+def get_active_clock() -> SimClock:
+    return _active_clock
+
+
+def now():
+    """Simulation time of the running game, replaces wall clock reads in gameplay code"""
+    return _active_clock.time
@@ -0,0 +1,71 @@
+from itertools import chain
+import math
+
+import numpy as np
+
+
+TILE_SIZE = 64  # map1.json tile size
+
+
+class SpatialGrid:
+    """Uniform cell hash of integer ids, queries only touch the cells they overlap"""
+
+    def __init__(self, cell_size=TILE_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def cell_of(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, item, cell):
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = {item}
+        else:
+            bucket.add(item)
+
+    def remove(self, item, cell):
+        bucket = self.cells[cell]
+        bucket.discard(item)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, item, old_cell, new_cell):
+        self.remove(item, old_cell)
+        self.insert(item, new_cell)
+
+    def clear(self):
+        self.cells.clear()
+
+    def query_cells(self, min_cx, min_cy, max_cx, max_cy):
+        """Ids in all cells of the inclusive cell range, unfiltered"""
+        cells = self.cells
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(cells):
+            buckets = [
+                bucket
+                for (cx, cy), bucket in cells.items()
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy
+            ]
+        else:
+            buckets = [
+                cells[cell]
+                for cell in (
+                    (cx, cy)
+                    for cx in range(min_cx, max_cx + 1)
+                    for cy in range(min_cy, max_cy + 1)
+                )
+                if cell in cells
+            ]
+        return np.fromiter(chain.from_iterable(buckets), dtype=np.int64)
+
+    def query_rect(self, x, y, width, height):
+        size = self.cell_size
+        return self.query_cells(
+            math.floor(x / size),
+            math.floor(y / size),
+            math.floor((x + width) / size),
+            math.floor((y + height) / size),
+        )
+
+    def query_radius(self, x, y, radius):
+        return self.query_rect(x - radius, y - radius, radius * 2, radius * 2)
@@ -0,0 +1,112 @@
+from dataclasses import dataclass, field
+from time import perf_counter
+import heapq
+
+from engine.rng import rng
+
+
+SPAWN_BUDGET_COUNT = 20
+SPAWN_BUDGET_TIME = 0.002  # seconds of a frame spawning may take
+
+
+class MapZone:
+    """Anywhere on the map, restricted to walkable tiles when a tile index is given"""
+
+    def __init__(self, map_width, map_height, tile_index=None):
+        self.map_width = map_width
+        self.map_height = map_height
+        self.tile_index = tile_index
+
+    def sample(self, view_x, view_y, view_w, view_h):
+        if self.tile_index is not None:
+            return self.tile_index.sample()
+        return rng.uniform(0, self.map_width), rng.uniform(0, self.map_height)
+
+
+class OutsideViewZone(MapZone):
+    """A band of the given width just outside the camera rectangle, clipped to the map"""
+
+    def __init__(self, map_width, map_height, tile_index=None, margin=256):
+        super().__init__(map_width, map_height, tile_index)
+        self.margin = margin
+
+    def _clip(self, rect):
+        x0, y0, x1, y1 = rect
+        return max(x0, 0), max(y0, 0), min(x1, self.map_width), min(y1, self.map_height)
+
+    def sample(self, view_x, view_y, view_w, view_h):
+        m = self.margin
+        left, bottom = view_x - m, view_y - m
+        right, top = view_x + view_w + m, view_y + view_h + m
+        strips = [
+            self._clip(rect)
+            for rect in (
+                (left, bottom, right, view_y),
+                (left, view_y + view_h, right, top),
+                (left, view_y, view_x, view_y + view_h),
+                (view_x + view_w, view_y, right, view_y + view_h),
+            )
+        ]
+        areas = [max(x1 - x0, 0) * max(y1 - y0, 0) for x0, y0, x1, y1 in strips]
+        total = sum(areas)
+        if total <= 0:
+            return super().sample(view_x, view_y, view_w, view_h)
+        pick = rng.random() * total
+        for index, area in enumerate(areas):
+            if pick < area:
+                break
+            pick -= area
+        if self.tile_index is None:
+            x0, y0, x1, y1 = strips[index]
+            return rng.uniform(x0, x1), rng.uniform(y0, y1)
+        # Picked strip first, then the others in case it is all water
+        for x0, y0, x1, y1 in strips[index:] + strips[:index]:
+            if x1 > x0 and y1 > y0:
+                pos = self.tile_index.sample_in_rect(x0, y0, x1, y1)
+                if pos is not None:
+                    return pos
+        return super().sample(view_x, view_y, view_w, view_h)
+
+
+@dataclass(order=True)
+class PendingSpawn:
+    priority: int
+    seq: int
+    tp: int = field(compare=False)
+    zone: MapZone = field(compare=False)
+
+
+class SpawnScheduler:
+    """Priority queue of spawns drained a few at a time so a wave never blows a frame"""
+
+    def __init__(self, budget_count=SPAWN_BUDGET_COUNT, budget_time=SPAWN_BUDGET_TIME):
+        self.budget_count = budget_count
+        self.budget_time = budget_time
+        self.queue = []
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def request(self, tp, zone, priority=0):
+        """Lower priority spawns first, equal ones in request order"""
+        heapq.heappush(self.queue, PendingSpawn(priority, self.seq, tp, zone))
+        self.seq += 1
+
+    def clear(self):
+        self.queue.clear()
+
+    def run(self, spawn, view_x, view_y, view_w, view_h):
+        """Calls spawn(tp, x, y) for queued spawns until the budget runs out.
+        At least one spawn is made per call so the queue always drains.
+        A budget_time of None limits by count only, which keeps runs replayable."""
+        start = perf_counter()
+        spawned = 0
+        while self.queue and spawned < self.budget_count:
+            pending = heapq.heappop(self.queue)
+            x, y = pending.zone.sample(view_x, view_y, view_w, view_h)
+            spawn(pending.tp, x, y)
+            spawned += 1
+            if self.budget_time is not None and perf_counter() - start >= self.budget_time:
+                break
+        return spawned
@@ -0,0 +1,147 @@
+from collections import deque
+from inspect import isgenerator
+from time import perf_counter
+import threading
+
+
+FIRST_PLAYABLE_FRAME = "first playable frame"
+
+
+class StartupPipeline:
+    """Named loading stages timed from launch.
+
+    Background stages run in order on one thread started by ``start``;
+    foreground stages (anything touching GL) run one per ``poll`` on the
+    main thread, so the menu keeps drawing in between. A foreground stage
+    waits for the background stage named in its ``after``, which has to be
+    added first, and one whose load returns a generator runs a step of it
+    per ``poll``. Milestones mark points such as the first playable frame;
+    the report lists both.
+    """
+
+    def __init__(self):
+        self.launched = perf_counter()
+        self.background = []
+        self.foreground = deque()
+        self.total = 0
+        self.background_done = 0  # each counter is written by one thread only
+        self.foreground_done = 0
+        self.loaded = set()  # names of the background stages done
+        self._steps = None  # (steps, launch offset at start) of the foreground stage running
+        self._step_seconds = 0.0  # spent in its steps so far
+        self.timings = []  # (stage, seconds since launch at its start, seconds, thread)
+        self.milestones = {}  # name: seconds since launch
+        self.error = None
+        self.started = False
+        self._thread = None
+
+    def add(self, name, load, background=True, after=None):
+        if after is not None and after not in (stage for stage, _ in self.background):
+            # poll() would wait for it forever
+            raise ValueError(f"{name!r} waits for unknown background stage {after!r}")
+        if background:
+            self.background.append((name, load))
+        else:
+            self.foreground.append((name, load, after))
+        self.total += 1
+
+    @staticmethod
+    def _stage_steps(load):
+        result = load()
+        if isgenerator(result):
+            yield from result
+
+    def _record(self, name, at, seconds):
+        self.timings.append((name, at, seconds, threading.current_thread().name))
+
+    def _run_background(self):
+        try:
+            for name, load in self.background:
+                start = perf_counter()
+                for _ in self._stage_steps(load):
+                    pass
+                self._record(name, start - self.launched, perf_counter() - start)
+                self.loaded.add(name)
+                self.background_done += 1
+        except Exception as error:
+            self.error = error
+            raise
+
+    def start(self):
+        self.started = True
+        self._thread = threading.Thread(
+            target=self._run_background, name="startup", daemon=True
+        )
+        self._thread.start()
+
+    def poll(self):
+        """Runs the next foreground stage or its next step once the background
+        stage it waits for is done, returns whether everything is loaded"""
+        if self.error is not None:
+            raise RuntimeError("startup stage failed") from self.error
+        if not self.foreground:
+            return self.finished
+        name, load, after = self.foreground[0]
+        if after is not None and after not in self.loaded:
+            return False
+        start = perf_counter()
+        if self._steps is None:
+            self._steps = self._stage_steps(load), start - self.launched
+            self._step_seconds = 0.0
+        steps, at = self._steps
+        running = next(steps, StopIteration) is not StopIteration
+        self._step_seconds += perf_counter() - start
+        if not running:
+            self._record(name, at, self._step_seconds)
+            self._steps = None
+            self.foreground.popleft()
+            self.foreground_done += 1
+        return self.finished
+
+    @property
+    def done(self):
+        return self.background_done + self.foreground_done
+
+    @property
+    def finished(self):
+        return self.done == self.total
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def current_stage(self):
+        if self.background_done < len(self.background):
+            return self.background[self.background_done][0]
+        if self.foreground:
+            return self.foreground[0][0]
+        return None
+
+    def wait(self):
+        """Blocks until every stage ran, running the ones left on the calling thread"""
+        if not self.started:
+            self.started = True
+            self._run_background()
+        elif self._thread is not None:
+            self._thread.join()
+        while self.foreground:
+            self.poll()
+        self.poll()
+
+    def mark(self, milestone):
+        """Records the milestone the first time it is reached, returns whether it was new"""
+        if milestone in self.milestones:
+            return False
+        self.milestones[milestone] = perf_counter() - self.launched
+        return True
+
+    def report(self):
+        lines = [f"{'startup stage':24}{'at s':>8}{'took s':>9}  thread"]
+        for name, at, seconds, thread in sorted(self.timings, key=lambda timing: timing[1]):
+            lines.append(f"{name:24}{at:8.3f}{seconds:9.3f}  {thread}")
+        for name, at in sorted(self.milestones.items(), key=lambda milestone: milestone[1]):
+            lines.append(f"{name:24}{at:8.3f}")
+        return "\n".join(lines)
+
+
+startup = StartupPipeline()
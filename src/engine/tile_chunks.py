@@ -0,0 +1,128 @@
+from math import ceil, floor
+from os.path import join
+
+from arcade.gl import BufferDescription
+import numpy as np
+from pyglet import gl
+
+
+CHUNK_TILES = 16  # chunk side in tiles
+TILE_CHUNKS_VERTEX_SHADER = join("src", "shader", "tile_chunks_vs.glsl")
+TILE_CHUNKS_FRAGMENT_SHADER = join("src", "shader", "tile_chunks_fs.glsl")
+
+
+def layers_extent(layers):
+    """(right, top) of everything in the sprite lists, tiles bigger than a
+    cell stick out past the map"""
+    right = top = 0
+    for sprite_list in layers:
+        if len(sprite_list):
+            right = max(right, max(sprite.center_x + sprite.width / 2 for sprite in sprite_list))
+            top = max(top, max(sprite.center_y + sprite.height / 2 for sprite in sprite_list))
+    return right, top
+
+
+class TileChunks:
+    """Static tile layers baked into chunk textures, drawn a chunk per quad.
+
+    A chunk holds the layers composited in order with premultiplied color
+    and, in alpha, how much of what lies below still shows through, so it
+    blends onto the background the same as the layers drawn one by one.
+    ``bake`` fills the chunks one step at a time and must finish before the
+    first draw. Animated tiles would freeze on the frame they had when baked.
+    """
+
+    def __init__(self, window, layers, tile_width, tile_height, program, chunk_tiles=CHUNK_TILES):
+        self.ctx = window.ctx
+        self.layers = layers
+        self.layer_names = set(layers)
+        self.program = program
+        self.chunk_width = chunk_tiles * tile_width
+        self.chunk_height = chunk_tiles * tile_height
+        right, top = layers_extent(layers.values())
+        self.columns = ceil(right / self.chunk_width)
+        self.rows = ceil(top / self.chunk_height)
+        self.rects = []  # (x, y, width, height), row major, bottom row first
+        for row in range(self.rows):
+            for col in range(self.columns):
+                x, y = col * self.chunk_width, row * self.chunk_height
+                width = min(self.chunk_width, ceil(right) - x)
+                height = min(self.chunk_height, ceil(top) - y)
+                self.rects.append((x, y, width, height))
+        self.textures = []
+        quads = [
+            [
+                (x, y, 0, 0),
+                (x + width, y, 1, 0),
+                (x, y + height, 0, 1),
+                (x + width, y + height, 1, 1),
+            ]
+            for x, y, width, height in self.rects
+        ]
+        self.buffer = self.ctx.buffer(data=np.array(quads, dtype=np.float32).tobytes())
+        self.geometry = self.ctx.geometry(
+            [BufferDescription(self.buffer, "2f 2f", ["in_vert", "in_uv"])]
+        )
+
+    def bake(self):
+        """Generator baking the next chunk at every step"""
+        # Fills the texture atlas now, its writes must not happen under the color masks
+        for sprite_list in self.layers.values():
+            sprite_list.initialize()
+        yield
+        for x, y, width, height in self.rects[len(self.textures):]:
+            self.textures.append(self._bake(self.layers.values(), x, y, width, height))
+            yield
+
+    def _bake(self, layers, x, y, width, height):
+        texture = self.ctx.texture(
+            (width, height),
+            components=4,
+            wrap_x=self.ctx.CLAMP_TO_EDGE,
+            wrap_y=self.ctx.CLAMP_TO_EDGE,
+        )
+        framebuffer = self.ctx.framebuffer(color_attachments=[texture])
+        projection = self.ctx.projection_2d_matrix
+        layers = [sprite_list for sprite_list in layers if sprite_list.visible]
+        with framebuffer.activate():
+            framebuffer.clear(color=(0, 0, 0, 255))
+            self.ctx.projection_2d = (x, x + width, y, y + height)
+            # Usual blending over black builds the premultiplied color
+            gl.glColorMask(True, True, True, False)
+            for sprite_list in layers:
+                sprite_list.draw()
+            # Every layer scales what shows through by its transparency
+            gl.glColorMask(False, False, False, True)
+            for sprite_list in layers:
+                sprite_list.draw(blend_function=(self.ctx.ZERO, self.ctx.ONE_MINUS_SRC_ALPHA))
+            gl.glColorMask(True, True, True, True)
+        self.ctx.projection_2d_matrix = projection
+        return texture
+
+    def visible_rect(self):
+        """(left, bottom, right, top) in world coordinates of what the
+        projection in use shows"""
+        # pyglet matrices are column major
+        matrix = np.array(self.ctx.projection_2d_matrix, dtype=np.float64).reshape(4, 4).T
+        corners = np.linalg.inv(matrix) @ np.array([(-1, -1, 0, 1), (1, 1, 0, 1)]).T
+        xs, ys = corners[0] / corners[3], corners[1] / corners[3]
+        return xs.min(), ys.min(), xs.max(), ys.max()
+
+    def draw(self):
+        """Draws the chunks the projection in use shows"""
+        left, bottom, right, top = self.visible_rect()
+        first_col = max(floor(left / self.chunk_width), 0)
+        first_row = max(floor(bottom / self.chunk_height), 0)
+        last_col = min(floor(right / self.chunk_width), self.columns - 1)
+        last_row = min(floor(top / self.chunk_height), self.rows - 1)
+        self.ctx.enable(self.ctx.BLEND)
+        blend_func = self.ctx.blend_func
+        self.ctx.blend_func = self.ctx.ONE, self.ctx.SRC_ALPHA
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                chunk = row * self.columns + col
+                self.textures[chunk].use(0)
+                self.geometry.render(
+                    self.program, mode=self.ctx.TRIANGLE_STRIP, first=chunk * 4, vertices=4
+                )
+        self.ctx.blend_func = blend_func
@@ -0,0 +1,91 @@
+import json
+import math
+
+import numpy as np
+
+from engine.rng import rng
+
+
+BLOCKING_LAYERS = ("water", "groundcollision1")
+GID_MASK = 0x1FFFFFFF  # strips Tiled flip flags
+
+
+def load_layer_gids(map_json, keep_flags=False):
+    """Tile gids per layer name, rows flipped so that row 0 is the bottom of the world"""
+    width, height = map_json["width"], map_json["height"]
+    mask = 0xFFFFFFFF if keep_flags else GID_MASK
+    return {
+        layer["name"]: (
+            np.array(layer["data"], dtype=np.uint32).reshape(height, width)[::-1] & mask
+        )
+        for layer in map_json["layers"]
+        if layer["type"] == "tilelayer"
+    }
+
+
+class TileIndex:
+    """Walkability grid of a tilemap, answers world queries without touching sprites"""
+
+    def __init__(self, walkable: np.ndarray, tile_width, tile_height):
+        self.walkable = np.ascontiguousarray(walkable, dtype=np.bool_)
+        self.rows, self.cols = self.walkable.shape
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.walkable_cells = np.flatnonzero(self.walkable).astype(np.int32)
+
+    @classmethod
+    def from_layers(cls, layers, tile_width, tile_height, blocking=BLOCKING_LAYERS):
+        shape = next(iter(layers.values())).shape
+        blocked = np.zeros(shape, dtype=np.bool_)
+        for name in blocking:
+            blocked |= layers[name] != 0
+        return cls(~blocked, tile_width, tile_height)
+
+    @classmethod
+    def from_file(cls, path, blocking=BLOCKING_LAYERS):
+        with open(path) as map_file:
+            map_json = json.load(map_file)
+        return cls.from_layers(
+            load_layer_gids(map_json),
+            map_json["tilewidth"],
+            map_json["tileheight"],
+            blocking,
+        )
+
+    def cell_at(self, x, y):
+        """(row, col) of the tile under the point, None outside the map"""
+        col = math.floor(x / self.tile_width)
+        row = math.floor(y / self.tile_height)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def is_walkable(self, x, y):
+        cell = self.cell_at(x, y)
+        return cell is not None and bool(self.walkable[cell])
+
+    def _point_in_cell(self, row, col):
+        return (
+            rng.uniform(col * self.tile_width, (col + 1) * self.tile_width),
+            rng.uniform(row * self.tile_height, (row + 1) * self.tile_height),
+        )
+
+    def sample(self):
+        """Uniformly random walkable position"""
+        cell = self.walkable_cells[rng.randrange(len(self.walkable_cells))]
+        return self._point_in_cell(*divmod(int(cell), self.cols))
+
+    def sample_in_rect(self, x0, y0, x1, y1):
+        """Random position on a walkable tile overlapping the rectangle, None if there is none"""
+        col0 = max(math.floor(x0 / self.tile_width), 0)
+        row0 = max(math.floor(y0 / self.tile_height), 0)
+        col1 = min(math.ceil(x1 / self.tile_width), self.cols)
+        row1 = min(math.ceil(y1 / self.tile_height), self.rows)
+        if col0 >= col1 or row0 >= row1:
+            return None
+        cells = np.flatnonzero(self.walkable[row0:row1, col0:col1])
+        if not len(cells):
+            return None
+        row, col = divmod(int(cells[rng.randrange(len(cells))]), col1 - col0)
+        x, y = self._point_in_cell(row0 + row, col0 + col)
+        return min(max(x, x0), x1), min(max(y, y0), y1)
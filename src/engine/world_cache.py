@@ -0,0 +1,95 @@
+import arcade
+
+from engine.headless import create_program, create_shadertoy, is_headless
+from engine.map_cache import CompiledMap
+from engine.tile_chunks import TILE_CHUNKS_FRAGMENT_SHADER, TILE_CHUNKS_VERTEX_SHADER, TileChunks
+
+
+class WorldCache:
+    """Process-wide resources GameViews share instead of loading them again.
+
+    Everything here must stay immutable once built: the tile layers are
+    shared by every scene made from them, shadertoys only get their
+    uniforms set right before each render.
+    """
+
+    def __init__(self):
+        self.maps = {}  # path: (CompiledMap, TileIndex, CollisionGrid)
+        self.tile_layers = {}  # path: {layer name: SpriteList}
+        self.shadertoys = {}  # (window, shader path): shadertoy
+        self.tile_chunks = {}  # (window, path): TileChunks
+        self.programs = {}  # (window, vertex shader path, fragment shader path): program
+        self.texture_sets = {}  # key: whatever the loader returned
+
+    def load_map(self, path):
+        """(CompiledMap, TileIndex, CollisionGrid) of a Tiled JSON map"""
+        loaded = self.maps.get(path)
+        if loaded is None:
+            compiled = CompiledMap.load(path)
+            loaded = compiled, compiled.tile_index(), compiled.collision_grid()
+            self.maps[path] = loaded
+        return loaded
+
+    def load_tile_layers(self, path):
+        layers = self.tile_layers.get(path)
+        if layers is None:
+            layers = self.load_map(path)[0].build_sprite_lists()
+            self.tile_layers[path] = layers
+        return layers
+
+    def scene(self, path):
+        """A fresh scene over the map's shared tile layers, layers added to it
+        later stay its own"""
+        scene = arcade.Scene()
+        for name, sprite_list in self.load_tile_layers(path).items():
+            scene.add_sprite_list(name, sprite_list=sprite_list)
+        return scene
+
+    def bake_tile_chunks(self, window, path):
+        """Generator baking the map's tile layers into chunks a chunk per step,
+        load_tile_chunks returns them once done"""
+        key = (window, path)
+        if is_headless(window) or key in self.tile_chunks:
+            return
+        compiled = self.load_map(path)[0]
+        chunks = TileChunks(
+            window,
+            self.load_tile_layers(path),
+            compiled.tile_width,
+            compiled.tile_height,
+            self.program(window, TILE_CHUNKS_VERTEX_SHADER, TILE_CHUNKS_FRAGMENT_SHADER),
+        )
+        yield from chunks.bake()
+        self.tile_chunks[key] = chunks
+
+    def load_tile_chunks(self, window, path):
+        """The map's tile layers baked into chunks, None without a GL context"""
+        for _ in self.bake_tile_chunks(window, path):
+            pass
+        return self.tile_chunks.get((window, path))
+
+    def shadertoy(self, window, path):
+        key = (window, path)
+        shadertoy = self.shadertoys.get(key)
+        if shadertoy is None:
+            shadertoy = create_shadertoy(window, path)
+            self.shadertoys[key] = shadertoy
+        return shadertoy
+
+    def program(self, window, vertex_shader, fragment_shader):
+        key = (window, vertex_shader, fragment_shader)
+        program = self.programs.get(key)
+        if program is None:
+            program = create_program(window, vertex_shader, fragment_shader)
+            self.programs[key] = program
+        return program
+
+    def texture_set(self, key, loader):
+        textures = self.texture_sets.get(key)
+        if textures is None:
+            textures = loader()
+            self.texture_sets[key] = textures
+        return textures
+
+
+world_cache = WorldCache()
@@ -1,6 +1,7 @@
 import arcade
 from pyglet.math import Vec2
 
+from engine.hitbox_cache import load_texture
 from utils import EPS
 
 
@@ -8,6 +9,7 @@ UP = 0
 DOWN = 1
 LEFT = 2
 RIGHT = 3
+TEXTURE_CHANGE_DISTANCE = 20  # px walked between two walking frames
 
 
 def reorder(lst):
@@ -19,7 +21,7 @@ def load_default_animated(filepath, width=32, height=32):
     textures = {UP: [], DOWN: [], LEFT: [], RIGHT: []}
     for row in range(len(anim_seq)):
         for col in range(3):
-            texture = arcade.load_texture(
+            texture = load_texture(
                 filepath,
                 x=width * col,
                 y=height * row,
@@ -42,7 +44,7 @@ class AnimatedSprite(arcade.Sprite):
         self.last_direction = DOWN
         self.last_center = Vec2(self.center_x, self.center_y)
         self.first_change = True
-        self.texture_change_distance = 20
+        self.texture_change_distance = TEXTURE_CHANGE_DISTANCE
 
     def update_animation(self, delta_time: float = 1 / 60):
         center = Vec2(self.center_x, self.center_y)
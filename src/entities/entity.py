@@ -1,8 +1,9 @@
 from collections import deque
-from time import time
 
 import arcade
 
+from engine.sim_clock import now
+
 
 class Entity(arcade.Sprite):
     def __init__(self, *args, hitpoints=100, **kwargs):
@@ -15,6 +16,6 @@ class Entity(arcade.Sprite):
 
     def damage(self, amount: int):
         self.hitpoints -= amount
-        self.damaged_queue.appendleft((amount, time()))
+        self.damaged_queue.appendleft((amount, now()))
         if self.hitpoints <= 0:
             self.dead = True
@@ -1,12 +1,13 @@
 from dataclasses import dataclass
 from os.path import abspath, join
-from random import randint, random
 import math
 
 import arcade
-from arcade.experimental.shadertoy import Shadertoy
 from pyglet.math import Vec2
 
+from engine.hitbox_cache import load_texture
+from engine.rng import rng
+from engine.world_cache import world_cache
 from entities.player import Player
 from utils import EPS, get_random_direction, mul_vec_const, triange_area_3p, sprite_pos
 
@@ -18,7 +19,7 @@ def load_boss_textures(filepath, row, width=96, height=96):
             arcade.AnimationKeyframe(
                 col,
                 120,
-                arcade.load_texture(
+                load_texture(
                     filepath, x=col * width, y=row * height, width=width, height=height
                 ),
             )
@@ -85,78 +86,47 @@ class FirstBoss(Fighter, arcade.AnimatedTimeBasedSprite):
         self.attacking_time = 0
         self.is_shield_active = False
         self.dead_time = None
-        self.shield_shadertoy = Shadertoy
-        self.lightning_shadertoy = Shadertoy
         self.lightnings = []
-        self.balls_shadertoy = Shadertoy
         self.balls = []
         self.last_spawned_ball_time = 0
         self.draw_cum_delta_time = 0
 
     def setup(self):
-        self.shield_shadertoy = Shadertoy.create_from_file(
-            self.parent_view.window.get_size(), "src/shader/shield.glsl"
-        )
-        self.lightning_shadertoy = Shadertoy.create_from_file(
-            self.parent_view.window.get_size(), "src/shader/lightning.glsl"
-        )
-        self.balls_shadertoy = Shadertoy.create_from_file(
-            self.parent_view.window.get_size(), "src/shader/glowing_ball.glsl"
-        )
-        self.boss_kill_shadertoy = Shadertoy.create_from_file(
-            self.parent_view.window.get_size(), "src/shader/boss_kill.glsl"
+        self.boss_kill_shadertoy = world_cache.shadertoy(
+            self.parent_view.window, "src/shader/boss_kill.glsl"
         )
 
     def draw_attack(self):
+        effects = self.parent_view.effects
         if self.is_shield_active:
-            self.shield_shadertoy.program["pos"] = (
-                sprite_pos(self) - self.parent_view.camera.position
-            )
-            self.shield_shadertoy.program["color"] = arcade.get_three_float_color(
-                arcade.color.LIGHT_BLUE
-            )
-            self.shield_shadertoy.program["radius"] = (
+            effects.add_shield(
+                *sprite_pos(self),
                 math.cos(self.draw_cum_delta_time) * SHIELD_VISUAL_RADIUS_VARY
-                + SHIELD_VISUAL_RADIUS
+                + SHIELD_VISUAL_RADIUS,
+                arcade.get_three_float_color(arcade.color.LIGHT_BLUE),
             )
 
-            self.shield_shadertoy.render()
-
         for lightning in self.lightnings:
-            self.lightning_shadertoy.program["pos"] = (
-                sprite_pos(self) - self.parent_view.camera.position
-            )
-            self.lightning_shadertoy.program["rot"] = lightning.rot
-            self.lightning_shadertoy.program["radius"] = 40
-            self.lightning_shadertoy.program["color"] = lightning.color
-
-            self.lightning_shadertoy.render()
+            effects.add_beam(*sprite_pos(self), lightning.rot, 40, lightning.color)
 
         for ball in self.balls:
             if not ball.visible:
                 continue
-            self.balls_shadertoy.program["pos"] = (
-                ball.pos - self.parent_view.camera.position
-            )
-            self.balls_shadertoy.program["color"] = arcade.color.ORANGE_RED
-            self.balls_shadertoy.program["radius"] = ball.radius
-
-            self.balls_shadertoy.render()
+            effects.add_glow(*ball.pos, ball.radius, arcade.color.ORANGE_RED)
 
     def draw_death(self):
         self.boss_kill_shadertoy.program["pos"] = (
             sprite_pos(self) - self.parent_view.camera.position
         )
         self.boss_kill_shadertoy.program["color"] = arcade.color.ANTI_FLASH_WHITE
+        self.boss_kill_shadertoy.program["radius"] = self.death_radius()
+        self.boss_kill_shadertoy.render()
+
+    def death_radius(self):
         since_death = self.draw_cum_delta_time - self.dead_time
         if since_death == 0:
             since_death = EPS
-        radius = math.exp(since_death**4)
-        self.boss_kill_shadertoy.program["radius"] = radius
-        if radius > self.parent_view.camera.viewport_width:
-            self.is_ready_to_hide = True
-
-        self.boss_kill_shadertoy.render()
+        return math.exp(since_death**4)
 
     def draw_ui(self):
         if self.is_dead and self.dead_time is not None:
@@ -165,6 +135,7 @@ class FirstBoss(Fighter, arcade.AnimatedTimeBasedSprite):
     def on_draw(self):
         if not self.is_dead or self.dead_time is None:
             self.draw_attack()
+            self.parent_view.effects.draw(self.parent_view.camera)
         self.draw()
 
     def activate_shield(self):
@@ -181,6 +152,9 @@ class FirstBoss(Fighter, arcade.AnimatedTimeBasedSprite):
             self.visible = False
             if self.dead_time is None:
                 self.dead_time = self.draw_cum_delta_time
+            # Decided here rather than when drawing so fights also end without rendering
+            if self.death_radius() > self.parent_view.camera.viewport_width:
+                self.is_ready_to_hide = True
 
     def damage(self, amount: int):
         if not self.is_shield_active:
@@ -194,7 +168,7 @@ class FirstBoss(Fighter, arcade.AnimatedTimeBasedSprite):
         self.update_balls(player, delta_time)
         if self.cur_attack_type is None:
             self.attacking_time = 0
-            self.cur_attack_type = randint(0, 2)
+            self.cur_attack_type = rng.randint(0, 2)
         else:
             self.attacking_time += delta_time
         # Shield
@@ -248,7 +222,7 @@ class FirstBoss(Fighter, arcade.AnimatedTimeBasedSprite):
                             + (sprite_pos(player) - sprite_pos(self)).normalize()
                         ).normalize(),
                         player2boss_dist,
-                        randint(5, 15),
+                        rng.randint(5, 15),
                         arcade.color.DARK_ORANGE,
                     )
                 )
@@ -1,11 +1,12 @@
 from dataclasses import dataclass
 from os.path import abspath, join
-from time import time
 import math
 
 import arcade
 from pyglet.math import Vec2
 
+from engine.hitbox_cache import load_texture
+from engine.sim_clock import now
 from entities.entity import Entity
 from utils import mul_vec_const
 from views.upgrade_tree import IDF2UPGRADE
@@ -30,11 +31,11 @@ class Player(Entity, arcade.AnimatedTimeBasedSprite):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.scale = 1.5
-        self.speed = 3
+        self.speed = 120  # pixels per second
         self.attack_range = 100
         self.attack_damage = DEF_DAMAGE
         self.direction = Vec2(1, 1)
-        self.texture = arcade.load_texture(
+        self.texture = load_texture(
             abspath(join("textures", "player", "walkback1.png"))
         )
         self.hit_box_algorithm = "Detailed"
@@ -50,13 +51,13 @@ class Player(Entity, arcade.AnimatedTimeBasedSprite):
         self.attack_speed = 1
         self.attack_time = 0.5
         self.acquired_upgrades_idf = set()
-        self.last_heal = time()
+        self.last_heal = now()
         self.gotos = []
 
     def update(self):
-        if time() - self.last_heal >= 1:
+        if now() - self.last_heal >= 1:
             self.hitpoints = min(self.hitpoints + self.heal_speed, self.max_hitpoints)
-            self.last_heal = time()
+            self.last_heal = now()
 
     def start_attacking(self):
         self.is_attacking = True
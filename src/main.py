@@ -1,15 +1,227 @@
-import arcade
-
-from views.game_view import GameView, MainWindow
-
-
-def main():
-    game_window = arcade.Window(1920, 1080, resizable=True)
-    menu_view = MainWindow()
-    game_window.show_view(menu_view)
-    arcade.run()
-
-
-if __name__ == '__main__':
-    main()
-
+from random import SystemRandom
+from time import perf_counter
+import argparse
+
+import arcade
+
+from engine.headless import HeadlessWindow, is_headless
+from engine.hitbox_cache import save_hit_box_cache
+from engine.hitch import (
+    GC_MODES,
+    HITCH_BUDGET_MS,
+    HITCH_LOG,
+    GcTuner,
+    get_gc_tuner,
+    set_gc_tuner,
+    start_hitch_detector,
+    stop_hitch_detector,
+)
+from engine.profiler import PROFILE_RATE, start_profiler, stop_profiler, toggle_profiler
+from engine.replay import InputRecorder, Replay
+from engine.rng import set_base_seed
+from engine.startup import FIRST_PLAYABLE_FRAME, startup
+from views.game_view import SAVE_PATH, GameView, MainWindow, add_world_stages, load_upgrades
+
+
+WINDOW_WIDTH = 1920
+WINDOW_HEIGHT = 1080
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run the game simulation without a window and report its throughput",
+    )
+    parser.add_argument(
+        "--frames", type=int, default=3600, help="simulation ticks to run headless"
+    )
+    parser.add_argument(
+        "--fight", action="store_true", help="start the headless run in a boss fight"
+    )
+    parser.add_argument("--seed", type=int, help="seed of the game's random stream")
+    parser.add_argument(
+        "--record", metavar="FILE", help="start straight in the game and record its input"
+    )
+    parser.add_argument(
+        "--replay", metavar="FILE", help="replay a recording, headless with --headless"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="sample Python stacks from the start, F4 toggles it in any case",
+    )
+    parser.add_argument(
+        "--profile-rate", type=int, default=PROFILE_RATE, help="profiler samples per second"
+    )
+    parser.add_argument(
+        "--hitch-budget",
+        type=float,
+        metavar="MS",
+        help=f"log frames slower than this, {HITCH_BUDGET_MS:.1f} ms with --hitch-log alone",
+    )
+    parser.add_argument("--hitch-log", metavar="FILE", help=f"hitch log, {HITCH_LOG} by default")
+    parser.add_argument(
+        "--gc",
+        action="append",
+        choices=GC_MODES,
+        default=[],
+        help="garbage collector tuning: freeze after loading the game, "
+        "manual collections in quiet frames",
+    )
+    return parser.parse_args()
+
+
+def setup_profiling(window, args):
+    if args.profile:
+        start_profiler(window, args.profile_rate)
+    if is_headless(window):
+        return
+
+    def on_key_press(symbol, modifiers):
+        if symbol == arcade.key.F4:
+            toggle_profiler(window, args.profile_rate)
+
+    window.push_handlers(on_key_press)
+
+
+def setup_diagnostics(window, args):
+    """Returns the per-frame handlers pushed on the window, for loops that do
+    not run its event loop"""
+    setup_profiling(window, args)
+    frame_handlers = []
+    if args.hitch_budget is not None or args.hitch_log is not None:
+        detector = start_hitch_detector(
+            window,
+            HITCH_BUDGET_MS if args.hitch_budget is None else args.hitch_budget,
+            args.hitch_log or HITCH_LOG,
+        )
+        frame_handlers.append(detector.on_update)
+    tuner = GcTuner(args.gc)
+    set_gc_tuner(tuner)
+    tuner.start()
+    if tuner.manual:
+        window.push_handlers(tuner.on_update)
+        frame_handlers.append(tuner.on_update)
+    return frame_handlers
+
+
+def load_world(window):
+    """Loads the world up front, for runs that start straight in the game"""
+    add_world_stages(startup, window)
+    startup.wait()
+
+
+def report_startup():
+    if startup.mark(FIRST_PLAYABLE_FRAME):
+        print(startup.report())
+
+
+def replayable_game(upgrades):
+    """Game starting with the given upgrades, which neither reads nor writes the save"""
+    game_view = GameView()
+    game_view.replayable = True
+    game_view.save_path = None
+    game_view.upgrades = upgrades
+    return game_view
+
+
+def run_headless(args):
+    window = HeadlessWindow(WINDOW_WIDTH, WINDOW_HEIGHT)
+    setup_diagnostics(window, args)
+    load_world(window)
+    game_view = GameView()
+    game_view.save_path = None  # benchmark runs leave the player's progress alone
+    window.show_view(game_view)
+    report_startup()
+    if args.fight:
+        from entities.fighter import FirstBoss
+        from views.fight_view import FightView
+
+        window.show_view(FightView(game_view, FirstBoss()))
+    done, elapsed = window.run(args.frames)
+    print(
+        f"{done} ticks in {elapsed:.3f} s, {done / max(elapsed, 1e-9):.0f} ticks/s, "
+        f"{elapsed / max(done, 1) * 1000:.3f} ms/tick, "
+        f"{len(game_view.enemy_sim)} enemies, player hp {game_view.player.hitpoints}"
+    )
+
+
+def record(args, seed):
+    game_window = arcade.Window(WINDOW_WIDTH, WINDOW_HEIGHT, resizable=True)
+    upgrades = load_upgrades(SAVE_PATH)
+    recorder = InputRecorder(seed, upgrades)
+    recorder.attach(game_window)
+    setup_diagnostics(game_window, args)
+    load_world(game_window)
+    game_window.show_view(replayable_game(upgrades))
+    arcade.run()
+    recorder.save(args.record)
+    print(f"recorded {len(recorder.frame_times)} frames to {args.record}")
+
+
+def replay(args):
+    recording = Replay.load(args.replay)
+    set_base_seed(recording.seed)
+    if args.headless:
+        window = HeadlessWindow(WINDOW_WIDTH, WINDOW_HEIGHT)
+    else:
+        window = arcade.Window(WINDOW_WIDTH, WINDOW_HEIGHT, resizable=True)
+    frame_handlers = setup_diagnostics(window, args)
+
+    def on_frame(delta_time):
+        if not args.headless:
+            if window.current_view is not None:
+                window.current_view.on_draw()
+            window.flip()
+        for handler in frame_handlers:
+            handler(delta_time)
+
+    load_world(window)
+    game_view = replayable_game(recording.upgrades)
+    window.show_view(game_view)
+    if args.headless:
+        report_startup()
+    start = perf_counter()
+    played = recording.play(window, on_frame)
+    print(
+        f"replayed {played} / {len(recording)} frames in {perf_counter() - start:.3f} s, "
+        f"player hp {game_view.player.hitpoints}, xp {game_view.player.xp}"
+    )
+
+
+def run(args):
+    seed = args.seed if args.seed is not None else SystemRandom().getrandbits(32)
+    if args.replay:
+        replay(args)
+        return
+    set_base_seed(seed)
+    if args.headless:
+        run_headless(args)
+        return
+    if args.record:
+        record(args, seed)
+        return
+    game_window = arcade.Window(WINDOW_WIDTH, WINDOW_HEIGHT, resizable=True)
+    setup_diagnostics(game_window, args)
+    add_world_stages(startup, game_window)
+    startup.start()
+    menu_view = MainWindow()
+    game_window.show_view(menu_view)
+    arcade.run()
+
+
+def main():
+    args = parse_args()
+    try:
+        run(args)
+    finally:
+        stop_profiler()
+        stop_hitch_detector()
+        get_gc_tuner().stop()
+        save_hit_box_cache()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#version 330
+
+// Same as MAX_BEAMS in engine/effects.py
+const int MAX_BEAMS = 16;
+
+// Window pixels of the first point, angle and length setting the direction
+uniform vec4 beams[MAX_BEAMS];
+uniform vec3 beam_colors[MAX_BEAMS];
+uniform int beam_count;
+
+out vec4 fragColor;
+
+void main() {
+    vec2 frag = gl_FragCoord.xy;
+    // The beams blended over each other in order, premultiplied
+    vec3 color = vec3(0.0);
+    float shows_through = 1.0;
+    for (int i = 0; i < beam_count; i++) {
+        vec2 origin = beams[i].xy;
+        vec2 second = origin + beams[i].w * vec2(cos(beams[i].z), sin(beams[i].z));
+        float area = abs(
+            frag.y * (origin.x - second.x)
+            + origin.y * (second.x - frag.x)
+            + second.y * (frag.x - origin.x)
+        ) / 2.0;
+        // Fades with the distance to the line
+        float height = area * 2.0 / distance(origin, second) / 5.0;
+        float alpha = 0.0;
+        if (dot(frag, origin) > 0.0 && dot(frag, second) > 0.0)
+            alpha = clamp(1.0 / height, 0.0, 1.0);
+        // What the framebuffer did to the shadertoys' unclamped output
+        color = mix(color, clamp(beam_colors[i], 0.0, 1.0), alpha);
+        shows_through *= 1.0 - alpha;
+    }
+    float coverage = 1.0 - shows_through;
+    // Blended with SRC_ALPHA, ONE_MINUS_SRC_ALPHA this adds color over what shows through
+    fragColor = coverage > 0.0 ? vec4(color / coverage, coverage) : vec4(0.0);
+}
@@ -0,0 +1,8 @@
+#version 330
+
+in vec2 in_corner;
+
+void main() {
+    // Covers the whole window
+    gl_Position = vec4(in_corner, 0.0, 1.0);
+}
@@ -0,0 +1,14 @@
+#version 330
+
+uniform sampler2D atlas;
+uniform vec4 color;
+
+in vec2 v_uv;
+in float v_alpha;
+
+out vec4 fragColor;
+
+void main() {
+    if (v_alpha <= 0.0) discard;
+    fragColor = vec4(color.rgb, color.a * texture(atlas, v_uv).a * v_alpha);
+}
@@ -0,0 +1,25 @@
+#version 330
+
+uniform Projection {
+    uniform mat4 matrix;
+} proj;
+
+uniform float time;
+uniform float rise;
+
+in vec2 in_anchor;
+in vec2 in_corner;
+in vec2 in_uv;
+in float in_received;
+
+out vec2 v_uv;
+out float v_alpha;
+
+void main() {
+    float elapsed = time - in_received;
+    // Rises from one to three bar heights above the anchor while fading out
+    float y = in_anchor.y + rise * (1.0 + 2.0 * elapsed);
+    v_alpha = elapsed >= 0.0 && elapsed < 1.0 ? 1.0 - elapsed : 0.0;
+    v_uv = in_uv;
+    gl_Position = proj.matrix * vec4(in_anchor.x + in_corner.x, y + in_corner.y, 0.0, 1.0);
+}
@@ -0,0 +1,24 @@
+#version 330
+
+// Same kinds as engine/effects.py
+const int SHIELD = 0;
+const int GLOW = 1;
+
+in vec2 v_offset;
+flat in float v_radius;
+flat in vec3 v_color;
+flat in int v_kind;
+
+out vec4 fragColor;
+
+void main() {
+    float alpha = 0.0;
+    if (v_kind == SHIELD) {
+        // Brightest at the rim, nothing outside it
+        alpha = 3.0 / (v_radius - length(v_offset));
+    } else if (v_kind == GLOW) {
+        alpha = pow(v_radius / length(v_offset), 1.7);
+    }
+    // What the framebuffer did to the shadertoys' unclamped output
+    fragColor = clamp(vec4(v_color, alpha), 0.0, 1.0);
+}
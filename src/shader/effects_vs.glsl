@@ -0,0 +1,25 @@
+#version 330
+
+// Window pixels of the effects' centers map onto it
+uniform vec4 viewport;
+
+in vec2 in_corner;
+
+in vec2 in_center;
+in float in_half_size;
+in float in_radius;
+in vec3 in_color;
+in float in_kind;
+
+out vec2 v_offset;
+flat out float v_radius;
+flat out vec3 v_color;
+flat out int v_kind;
+
+void main() {
+    v_radius = in_radius;
+    v_color = in_color;
+    v_kind = int(in_kind);
+    v_offset = in_corner * in_half_size;
+    gl_Position = vec4((in_center + v_offset) / viewport.zw * 2.0 - 1.0, 0.0, 1.0);
+}
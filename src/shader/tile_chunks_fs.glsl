@@ -0,0 +1,11 @@
+#version 330
+
+uniform sampler2D chunk;
+
+in vec2 v_uv;
+
+out vec4 fragColor;
+
+void main() {
+    fragColor = texture(chunk, v_uv);
+}
@@ -1,9 +1,10 @@
 from math import ceil
-from random import random
 
 import arcade
 from pyglet.math import Vec2
 
+from engine.rng import rng
+
 
 EPS = 1e-3
 
@@ -31,6 +32,6 @@ def triange_area_3p(p1: Vec2, p2: Vec2, p3: Vec2):
 
 
 def get_random_direction() -> Vec2:
-    x = random() - 0.5
-    y = random() - 0.5
+    x = rng.random() - 0.5
+    y = rng.random() - 0.5
     return Vec2(x, y).normalize()  # I know you can do it without the method
@@ -18,6 +18,7 @@ class FightView(arcade.View):
         self.prev_view.is_fighting = True
         self.player = self.prev_view.player
         self.camera = self.prev_view.camera
+        self.effects = self.prev_view.effects
         self.fighter = fighter
         self.fighter.parent_view = self
         self.fighter.setup()
@@ -76,6 +77,7 @@ class FightView(arcade.View):
             20,
         )
         self.fighter.draw_ui()
+        self.prev_view.draw_frame_timing()
 
     def restrict_player(self):
         self.player.center_x = max(
@@ -109,12 +111,21 @@ class FightView(arcade.View):
         self.player.center_x += self.player.change_x
         self.player.center_y += self.player.change_y
 
-    def on_update(self, delta_time: float):
+    def tick(self, delta_time: float):
         self.prev_view.update_universal(delta_time)
         self.restrict_player()
         self.update_fighter(delta_time)
         self.move_player(delta_time)
 
+    def on_update(self, delta_time: float):
+        self.prev_view.frame_timer.begin_frame()
+        clock = self.prev_view.clock
+        for _ in range(clock.advance(delta_time)):
+            clock.step()
+            self.tick(clock.tick)
+            if self.window.current_view is not self:
+                return
+
     def on_key_press(self, symbol: int, modifiers: int):
         self.prev_view.on_key_press_universal(symbol, modifiers)
 
@@ -1,24 +1,50 @@
 import math
-from os.path import abspath, join, exists
-from random import randint
+from importlib import import_module
+from os.path import abspath, basename, join, exists
 import json
 
 import arcade
 import arcade.gui
 import pyglet.math as gmath
-from arcade.experimental.shadertoy import Shadertoy
 from pyglet.math import Vec2
 
+from engine.collision import TileCollisionEngine
+from engine.damage_numbers import (
+    DAMAGE_NUMBERS_FRAGMENT_SHADER,
+    DAMAGE_NUMBERS_VERTEX_SHADER,
+    DamageNumbers,
+)
+from engine.effects import (
+    BEAMS_FRAGMENT_SHADER,
+    BEAMS_VERTEX_SHADER,
+    EFFECTS_FRAGMENT_SHADER,
+    EFFECTS_VERTEX_SHADER,
+    EffectRenderer,
+)
+from engine.enemy_pool import EnemyPool
+from engine.enemy_sim import EnemySimulation
+from engine.flow_field import FlowField
+from engine.frame_timing import FrameTimer, FrameTimingOverlay
+from engine.headless import HeadlessCamera, is_headless
+from engine.hitbox_cache import load_texture
+from engine.hitch import get_gc_tuner
+from engine.hp_bars import HpBarRenderer
+from engine.rng import next_game_seed, rng
+from engine.sim_clock import SimClock, set_active_clock
+from engine.spawn_scheduler import SPAWN_BUDGET_TIME, MapZone, SpawnScheduler
+from engine.startup import FIRST_PLAYABLE_FRAME, startup
+from engine.world_cache import world_cache
 from entities.player import Goto, Player
 from entities.animated import DOWN, load_default_animated
-from entities.fighter import FirstBoss
-from entities.enemy import Enemy, MIN_ENEMY_TP, MAX_ENEMY_TP
-from utils import get_color_from_gradient, mul_vec_const, is_point_in_rect, sprite_pos
+from entities.enemy import MIN_ENEMY_TP, MAX_ENEMY_TP, TP2ARCHETYPE
+from utils import get_color_from_gradient, mul_vec_const, is_point_in_rect
 from views.dialog_view import INCOGNITO_START, DialogView, Incognito, Npc
-from views.fight_view import FightView
 from views.upgrade_tree import UpgradeTreeView
 
 
+MAP_PATH = join("map", "map1.json")
+SAVE_PATH = "save.json"
+
 HP_BAR_WIDTH = 500
 HP_BAR_HEIGHT = 50
 HP_BAR_TEXT_SIZE = 20
@@ -35,11 +61,83 @@ HP_BAR_HEALTH_GRADIENT = [
     arcade.color.PASTEL_GREEN,
     arcade.color.PASTEL_GREEN,
 ]
-CHECK_PERF = False
 NPC_TRIGGER_DISTANCE = 100
 NPC2ICON_DISTANCE = 20
 TIP_MARGIN = 5
 
+PLAYER_WALK_SHEETS = ("walkleft.png", "walkright.png", "walkdown.png", "walkup.png")
+PRELOADED_SHADERS = ("src/shader/boss_kill.glsl",)
+PRELOADED_PROGRAMS = (
+    (EFFECTS_VERTEX_SHADER, EFFECTS_FRAGMENT_SHADER),
+    (BEAMS_VERTEX_SHADER, BEAMS_FRAGMENT_SHADER),
+    (DAMAGE_NUMBERS_VERTEX_SHADER, DAMAGE_NUMBERS_FRAGMENT_SHADER),
+)
+
+
+def load_upgrades(save_path):
+    """Upgrades acquired in the save, none when there is no save yet"""
+    if not exists(save_path):
+        return []
+    with open(save_path) as save_file:
+        return json.loads(save_file.read())
+
+
+def _load_player_walk_frames(all_frames: str):
+    res = []
+    for i in (1, 0, 1, 2):
+        texturee = load_texture(
+            abspath(join("textures", "player", all_frames)),
+            x=i * 32,
+            y=0,
+            width=32,
+            height=32,
+        )
+        anim = arcade.AnimationKeyframe(i, 120, texturee)
+        res.append(anim)
+    return res
+
+
+def player_walk_frames(all_frames: str):
+    return world_cache.texture_set(
+        ("player", all_frames), lambda: _load_player_walk_frames(all_frames)
+    )
+
+
+def add_world_stages(pipeline, window):
+    """Startup stages filling the world cache GameView.setup reads from"""
+    pipeline.add("map", lambda: world_cache.load_map(MAP_PATH))
+    pipeline.add("tile layers", lambda: world_cache.load_tile_layers(MAP_PATH))
+    pipeline.add(
+        "player textures",
+        lambda: [player_walk_frames(sheet) for sheet in PLAYER_WALK_SHEETS],
+    )
+    pipeline.add(
+        "enemy textures",
+        lambda: [archetype.textures for archetype in TP2ARCHETYPE.values()],
+    )
+    pipeline.add("fight modules", lambda: import_module("views.fight_view"))
+    # Shaders compile on the GL context, which belongs to the main thread
+    for path in PRELOADED_SHADERS:
+        pipeline.add(
+            f"shader {basename(path)}",
+            lambda path=path: world_cache.shadertoy(window, path),
+            background=False,
+        )
+    pipeline.add(
+        "tile chunks",
+        lambda: world_cache.bake_tile_chunks(window, MAP_PATH),
+        background=False,
+        after="tile layers",
+    )
+    for vertex_shader, fragment_shader in PRELOADED_PROGRAMS:
+        pipeline.add(
+            f"shader {basename(fragment_shader)}",
+            lambda shaders=(vertex_shader, fragment_shader): world_cache.program(
+                window, *shaders
+            ),
+            background=False,
+        )
+
 
 class GameView(arcade.View):
     def __init__(self):
@@ -58,21 +156,40 @@ class GameView(arcade.View):
         self.tiled_map = None
         self.physics_engine = None
         self.camera = None
+        self.sim_view = None  # camera origin of the last tick, the render camera is interpolated
         self.scene = None
+        self.tile_chunks = None
         self.has_been_setup = False
         self.npc = None
         self.is_fighting = False
         self.freeze_enemies = False
+        self.clock = SimClock()
+        self.player_prev_pos = None
+        self.player_sim_pos = None
+        self.player_render_pos = None
+        self.save_path = SAVE_PATH  # None keeps the run from loading or writing progress
+        self.upgrades = None  # upgrades to start with instead of the save's
+        self.enemies_cnt = None  # fixed horde size instead of the upgrade based one
+        self.spawn_zone_type = MapZone  # OutsideViewZone keeps enemies from spawning in sight
+        self.seed = next_game_seed()
+        self.replayable = False  # no wall clock dependent budgets, the run follows the seed
+        self.frame_timer = FrameTimer()
+        self.frame_timing_overlay = FrameTimingOverlay(self.frame_timer)
+        self.hp_bars = HpBarRenderer()
+        self.damage_numbers = DamageNumbers()
+        self.effects = EffectRenderer()
 
     def setup(self):
+        rng.seed(self.seed)
         self.player_list = arcade.SpriteList()
         self.enemies = arcade.SpriteList()
         self.npc = arcade.SpriteList()
 
         self.player = Player()
-        if exists('save.json'):
-            with open('save.json') as save_file:
-                self.player.acquired_upgrades_idf = set(json.loads(save_file.read()))
+        if self.upgrades is not None:
+            self.player.acquired_upgrades_idf = set(self.upgrades)
+        elif self.save_path is not None:
+            self.player.acquired_upgrades_idf = set(load_upgrades(self.save_path))
 
         self.player.center_x = 2000
         self.player.center_y = 2000
@@ -80,83 +197,73 @@ class GameView(arcade.View):
             player=self.player, default_direction=DOWN, center_x=1747, center_y=4500
         )
         self.attacks_list = arcade.SpriteList()
-        layer_options = {
-            "groundcollision1": {
-                "use_spatial_hash": True,
-                "hit_box_algorithm": "Detailed",
-                "hit_box_details": 20,
-            },
-        }
-        self.tiled_map = arcade.load_tilemap(
-            abspath(join("map", "map1.json")), 1, layer_options
-        )
+        # Collisions are resolved against CollisionGrid, tile sprites need no hit boxes
+        self.tiled_map, self.tile_index, self.collision_grid = world_cache.load_map(MAP_PATH)
         self.npc.append(incognito)
+        self.flow_field = FlowField(
+            self.tile_index.walkable,
+            self.tiled_map.tile_width,
+            self.tiled_map.tile_height,
+        )
+        self.enemy_sim = EnemySimulation(
+            cell_size=self.tiled_map.tile_width,
+            collision=self.collision_grid,
+            flow_field=self.flow_field,
+        )
 
         self.map_width = self.tiled_map.width * self.tiled_map.tile_width
         self.map_height = self.tiled_map.height * self.tiled_map.tile_height
-        self.scene = arcade.Scene.from_tilemap(self.tiled_map)
-        self.camera = arcade.Camera(self.window.width, self.window.height)
+        self.scene = world_cache.scene(MAP_PATH)
+        if is_headless(self.window):
+            self.camera = HeadlessCamera(self.window.width, self.window.height)
+        else:
+            self.camera = arcade.Camera(self.window.width, self.window.height)
+            self.tile_chunks = world_cache.load_tile_chunks(self.window, MAP_PATH)
         self.scene.add_sprite_list("player", use_spatial_hash=True)
 
         self.scene.add_sprite("player", self.player)
+        self.sim_view = self.camera_origin(restrict=True)
         self.setup_animations()
         self.setup_physics()
 
-        self.enemy_shadertoys = {}
-        self.enemy_shadertoys["glowing_ball"] = Shadertoy.create_from_file(
-            self.window.get_size(), "src/shader/glowing_ball.glsl"
+        self.enemy_pool = EnemyPool(self.enemies, self.enemy_sim)
+        self.enemy_pool.prefill(self.get_enemies_cnt())
+        self.spawn_scheduler = SpawnScheduler(
+            budget_time=None if self.replayable else SPAWN_BUDGET_TIME
         )
-        self.enemy_shadertoys["shield"] = Shadertoy.create_from_file(
-            self.window.get_size(), "src/shader/shield.glsl"
-        )
-
-        if CHECK_PERF:
-            arcade.enable_timings()
+        self.spawn_zone = self.spawn_zone_type(self.map_width, self.map_height, self.tile_index)
+        get_gc_tuner().after_setup()
 
     def on_hide_view(self):
+        if self.save_path is None:
+            return
         save = list(self.player.acquired_upgrades_idf)
         print("saved")
-        with open("save.json", "w") as save_f:
+        with open(self.save_path, "w") as save_f:
             save_str = json.dumps(save)
             save_f.write(save_str)
 
 
-    def load_player_animation_frames(self, all_frames: str):
-        res = []
-        for i in (1, 0, 1, 2):
-            texturee = arcade.load_texture(
-                abspath(join("textures", "player", all_frames)),
-                x=i * 32,
-                y=0,
-                width=32,
-                height=32,
-            )
-            anim = arcade.AnimationKeyframe(i, 120, texturee)
-            res.append(anim)
-        return res
-
     def setup_animations(self):
         if self.player.change_x == 0 and self.player.change_y == 0:
             self.player.frames = [
                 arcade.AnimationKeyframe(0, 120, self.player.texture)
             ] * 4  # FIXME Костыль*3?
         if self.player.change_x < 0:
-            self.player.frames = self.load_player_animation_frames("walkleft.png")
+            self.player.frames = player_walk_frames("walkleft.png")
         elif self.player.change_x > 0:
-            self.player.frames = self.load_player_animation_frames("walkright.png")
+            self.player.frames = player_walk_frames("walkright.png")
         if self.player.change_y < 0:
-            self.player.frames = self.load_player_animation_frames("walkdown.png")
+            self.player.frames = player_walk_frames("walkdown.png")
         elif self.player.change_y > 0:
-            self.player.frames = self.load_player_animation_frames("walkup.png")
+            self.player.frames = player_walk_frames("walkup.png")
 
     def setup_physics(self):
         self.player_list.append(self.player)
-        self.physics_engine = arcade.PhysicsEngineSimple(
-            self.player,
-            walls=[self.scene["water"], self.scene["groundcollision1"]],
-        )
+        self.physics_engine = TileCollisionEngine(self.player, self.collision_grid)
 
-    def center_camera_to_player(self, restrict=False):
+    def camera_origin(self, restrict=False):
+        """Bottom left corner of the view centered on the player"""
         scr_center_x = self.player.center_x - self.camera.viewport_width / 2
         scr_center_y = self.player.center_y - self.camera.viewport_height / 2
 
@@ -168,13 +275,14 @@ class GameView(arcade.View):
                 min(scr_center_y, self.map_height - self.camera.viewport_height), 0
             )
 
+        return Vec2(scr_center_x, scr_center_y)
 
-        player_centered = Vec2(scr_center_x, scr_center_y)
-
-        self.camera.move_to(player_centered)
+    def center_camera_to_player(self, restrict=False):
+        self.camera.move_to(self.camera_origin(restrict))
 
     def on_show_view(self):
         self.is_fighting = False
+        set_active_clock(self.clock)
         if not self.has_been_setup:
             self.setup()
             self.has_been_setup = True
@@ -258,15 +366,9 @@ class GameView(arcade.View):
                 XP_BAR_TEXT_SIZE,
             )
 
-    def _draw_fps(self):
-        arcade.draw_text(
-            str(arcade.get_fps()),
-            self.player.center_x + 100,
-            self.player.center_y + 100,
-            arcade.color.WHITE,
-            20,
-            bold=True,
-        )
+    def draw_frame_timing(self):
+        if self.frame_timer.enabled:
+            self.frame_timing_overlay.draw(self.camera)
 
     def draw_gotos(self):
         dist2arrow = self.player.height * 2
@@ -333,31 +435,49 @@ class GameView(arcade.View):
 
     def on_draw_universal(self):
         self.camera.use()
-        self.player_list.draw()
-        self.draw_bars(draw_hp=True)
+        with self.frame_timer.scope("hud"):
+            self.player_list.draw()
+            self.draw_bars(draw_hp=True)
 
     def on_draw(self):
+        timer = self.frame_timer
         self.clear()
-        self.scene.draw()
-        self.enemies.draw()
-        self.draw_npc()
+        with timer.scope("scene_draw"):
+            # Tile layers come from the baked chunks, the scene draws what was added on top
+            self.tile_chunks.draw()
+            self.scene.draw(
+                names=[
+                    name
+                    for name in self.scene.name_mapping
+                    if name not in self.tile_chunks.layer_names
+                ]
+            )
+        with timer.scope("enemies_draw"):
+            self.enemies.draw()
+        with timer.scope("npc"):
+            self.draw_npc()
         self.on_draw_universal()
-        for enemy in self.enemies:
-            if is_point_in_rect(
-                enemy.center_x,
-                enemy.center_y,
-                self.camera.position.x,
-                self.camera.position.y,
-                self.camera.viewport_width,
-                self.camera.viewport_height,
-            ):
-                enemy.draw_hp_bar()
+        visible_enemies = self.enemy_sim.query_rect(
+            self.camera.position.x,
+            self.camera.position.y,
+            self.camera.viewport_width,
+            self.camera.viewport_height,
+        )
+        with timer.scope("hp_bars"):
+            self.hp_bars.draw(visible_enemies)
+        with timer.scope("effects"):
+            for enemy in visible_enemies:
                 enemy.draw_effects(self)
-        self.draw_gotos()
-        self.draw_bars(draw_xp=True)
-
-        if CHECK_PERF:
-            self._draw_fps()
+                self.damage_numbers.take(enemy, self.clock.time)
+            self.effects.draw(self.camera)
+            self.damage_numbers.draw(self.clock.time)
+        with timer.scope("gotos"):
+            self.draw_gotos()
+        with timer.scope("hud"):
+            self.draw_bars(draw_xp=True)
+        self.draw_frame_timing()
+        if startup.mark(FIRST_PLAYABLE_FRAME):
+            print(startup.report())
 
     def update_npc(self, delta_time):
         player_pos = Vec2(self.player.center_x, self.player.center_y)
@@ -375,86 +495,109 @@ class GameView(arcade.View):
                 )  # TODO take dialog from npc and chars
 
     def update_universal(self, delta_time):
-        self.process_keychange(delta_time)
+        with self.frame_timer.scope("process_keychange"):
+            self.process_keychange(delta_time)
         self.center_camera_to_player()
         self.setup_animations()
         self.player.update()
         if self.player.hitpoints <= 0:
             self.scene.remove_sprite_list_by_name("player")
-            self.window.show_view(GameOverView())
+            if is_headless(self.window):
+                self.window.close()
+            else:
+                self.window.show_view(GameOverView())
         try:
             if self.player.frames:
                 self.player_list.update_animation()
         except IndexError as e:
             print(e, self.player.frames)
 
-    def on_update(self, delta_time):
+    def restore_player_position(self):
+        """Puts the player and the camera back from their interpolated render
+        positions, unless something moved the player on purpose since"""
+        if self.player_sim_pos is not None and self.player.position == self.player_render_pos:
+            self.player.position = self.player_sim_pos
+            self.camera.move_to(self.sim_view)
+        self.player_sim_pos = None
+
+    def interpolate(self, alpha):
+        if self.player_prev_pos is not None:
+            self.player_sim_pos = self.player.position
+            prev_x, prev_y = self.player_prev_pos
+            self.player_render_pos = (
+                arcade.lerp(prev_x, self.player_sim_pos[0], alpha),
+                arcade.lerp(prev_y, self.player_sim_pos[1], alpha),
+            )
+            self.player.position = self.player_render_pos
+            self.center_camera_to_player(restrict=True)
+        # arcade.Camera only applies move_to on use(), its position may be a frame old
+        view_x, view_y = self.camera_origin(restrict=True)
+        self.enemy_sim.sync_sprites(
+            alpha, view_x, view_y, self.camera.viewport_width, self.camera.viewport_height
+        )
+
+    def tick(self, delta_time):
         if not self.freeze_enemies:
-            self.update_enemies(delta_time)
+            with self.frame_timer.scope("update_enemies"):
+                self.update_enemies(delta_time)
         self.update_npc(delta_time)
         self.update_universal(delta_time)
         self.center_camera_to_player(restrict=True)
-        self.physics_engine.update()
+        self.sim_view = self.camera_origin(restrict=True)
+        with self.frame_timer.scope("physics"):
+            self.physics_engine.update()
+
+    def on_update(self, delta_time):
+        self.frame_timer.begin_frame()
+        self.restore_player_position()
+        for _ in range(self.clock.advance(delta_time)):
+            self.player_prev_pos = self.player.position
+            self.clock.step()
+            self.tick(self.clock.tick)
+            if self.window.current_view is not self:
+                # Dialog, game over or a fight took over, the rest of the ticks are theirs
+                self.player_prev_pos = None
+                return
+        self.interpolate(self.clock.alpha)
+
+    def get_enemies_cnt(self):
+        if self.enemies_cnt is not None:
+            return self.enemies_cnt
+        return 100 + len(self.player.acquired_upgrades_idf) * 10
 
     def update_enemies(self, delta_time):
-        i = len(self.enemies) - 1
-        while i >= 0:  # TODO use "for"
-            if self.enemies[i].dead:
-                self.player.gain_xp(self.enemies[i].kill_xp_reward)
-                self.enemies.pop(i)
-            i -= 1
-
-        enemies_cnt = 100 + len(self.player.acquired_upgrades_idf) * 10
-        if (
-            len(self.enemies) < enemies_cnt
-        ):  # TODO just for testing purposes here, replace later
-            for _ in range(enemies_cnt - len(self.enemies)):
-                new_enemy = Enemy.from_tp(
-                    randint(MIN_ENEMY_TP, MAX_ENEMY_TP),
-                    shadertoys=self.enemy_shadertoys,
-                )
-                new_enemy.center_x = randint(0, self.map_width)
-                new_enemy.center_y = randint(0, self.map_height)
-                self.enemies.append(new_enemy)
-
-        player_pos = sprite_pos(self.player)
-        self.enemy_shield_cnt = 0
-        for enemy in self.enemies:
-            enemy.update()
-            camera_x, camera_y = self.camera.position
-            camera_w, camera_h = self.camera.viewport_width, self.camera.viewport_height
-            enemy_pos = sprite_pos(enemy)
-            enemy2player_distance = player_pos.distance(enemy_pos)
-
-            if enemy.is_attacking:
-                enemy.update_attack(delta_time)
-            elif (
-                not enemy.attack.no_attack
-                and enemy2player_distance <= enemy.attack.attack_start_range
-            ):
-                enemy.start_attacking(self.player)
-            elif is_point_in_rect(
-                enemy.center_x,
-                enemy.center_y,
-                camera_x,
-                camera_y,
-                camera_w,
-                camera_h,
-            ):
-                if (
-                    not enemy.is_attacking
-                    and enemy2player_distance > enemy.attack.attack_start_range
-                ):
-                    enemy_x_delta, enemy_y_delta = (player_pos - enemy_pos).normalize()
-                    enemy.center_x += enemy_x_delta * delta_time * enemy.speed
-                    enemy.center_y += enemy_y_delta * delta_time * enemy.speed
-                if enemy.does_activate_shield:
-                    self.enemy_shield_cnt += 1
+        for enemy in self.enemy_sim.collect_dead():
+            self.player.gain_xp(enemy.kill_xp_reward)
+            self.enemy_pool.release(enemy)
+
+        view_x, view_y = self.sim_view
+        enemies_cnt = self.get_enemies_cnt()
+        missing = enemies_cnt - len(self.enemy_sim) - len(self.spawn_scheduler)
+        for _ in range(missing):  # TODO just for testing purposes here, replace later
+            self.spawn_scheduler.request(
+                rng.randint(MIN_ENEMY_TP, MAX_ENEMY_TP), self.spawn_zone
+            )
+        self.spawn_scheduler.run(
+            self.enemy_pool.acquire,
+            view_x,
+            view_y,
+            self.camera.viewport_width,
+            self.camera.viewport_height,
+        )
+
+        self.enemy_shield_cnt = self.enemy_sim.step(
+            delta_time,
+            self.player,
+            view_x,
+            view_y,
+            self.camera.viewport_width,
+            self.camera.viewport_height,
+        )
 
     def process_keychange(self, delta_time):
         self.player.direction = self.player.direction.normalize()
         self.player.change_x, self.player.change_y = mul_vec_const(
-            self.player.direction, self.player.speed * delta_time * 40
+            self.player.direction, self.player.speed * delta_time
         )
 
         if self.up_pressed and not self.down_pressed:
@@ -472,17 +615,21 @@ class GameView(arcade.View):
             self.player.change_x = 0
 
         if self.space_pressed:
-            for enemy in self.enemies:
-                enemy_pos = sprite_pos(enemy)
-                if self.player.can_attack(enemy_pos):
-                    if self.player.is_attacking:
-                        self.player.update_attack(delta_time)
-                    else:
-                        self.player.start_attacking()
-                        damage_coeff = 1
-                        if self.enemy_shield_cnt > 0:
-                            damage_coeff = 2 / (2 + self.enemy_shield_cnt)
-                        enemy.damage(self.player.attack_damage * damage_coeff)
+            for enemy in self.enemy_sim.query_cone(
+                self.player.center_x,
+                self.player.center_y,
+                self.player.direction.x,
+                self.player.direction.y,
+                self.player.attack_range,
+            ):
+                if self.player.is_attacking:
+                    self.player.update_attack(delta_time)
+                else:
+                    self.player.start_attacking()
+                    damage_coeff = 1
+                    if self.enemy_shield_cnt > 0:
+                        damage_coeff = 2 / (2 + self.enemy_shield_cnt)
+                    enemy.damage(self.player.attack_damage * damage_coeff)
 
     def on_key_press_universal(self, symbol: int, modifiers: int):
         if symbol == arcade.key.W:
@@ -495,8 +642,12 @@ class GameView(arcade.View):
             self.right_pressed = True
         elif symbol == arcade.key.SPACE:
             self.space_pressed = True
+        elif symbol == arcade.key.F3:
+            self.frame_timer.toggle()
 
     def on_key_press(self, symbol: int, modifiers: int):
+        # Keys act on the simulated world, not on the interpolated picture of it
+        self.restore_player_position()
         self.on_key_press_universal(symbol, modifiers)
         if symbol == arcade.key.F:
             self.f_pressed = True
@@ -505,6 +656,9 @@ class GameView(arcade.View):
         elif symbol == arcade.key.T:
             self.player.set_position(self.npc[0].center_x, self.npc[0].center_y)
         elif symbol == arcade.key.G:
+            from entities.fighter import FirstBoss
+            from views.fight_view import FightView
+
             boss = FirstBoss()
             self.window.show_view(FightView(self, boss))
         elif symbol == arcade.key.E:
@@ -629,6 +783,9 @@ FADE_RATE = 100
 START_BUTTON_WIDTH = 300
 SETTINGS_BUTTON_WIDTH = 300
 EXIT_BUTTON_WIDTH = 300
+LOADING_BAR_MARGIN = 40
+LOADING_BAR_HEIGHT = 20
+LOADING_TEXT_SIZE = 14
 
 class MainWindow(FadingView):
     def __init__(self):
@@ -644,7 +801,9 @@ class MainWindow(FadingView):
         pass
 
     def on_update(self, dt):
-        self.update_fade(next_view=self.w)
+        # Start fades out right away, the game opens once the world is loaded
+        loaded = startup.poll()
+        self.update_fade(next_view=self.w if loaded else None)
 
     def on_show_view(self):
         arcade.set_background_color(arcade.color.TEA_GREEN)
@@ -682,9 +841,29 @@ class MainWindow(FadingView):
         self.fade_out = 0
         self.uimanager.disable()
 
+    def draw_loading(self):
+        if startup.finished:
+            return
+        left = LOADING_BAR_MARGIN
+        right = self.window.width - LOADING_BAR_MARGIN
+        bottom = LOADING_BAR_MARGIN
+        top = bottom + LOADING_BAR_HEIGHT
+        arcade.draw_lrtb_rectangle_filled(left, right, top, bottom, arcade.color.DARK_GREEN)
+        arcade.draw_lrtb_rectangle_filled(
+            left, left + (right - left) * startup.progress, top, bottom, arcade.color.PASTEL_GREEN
+        )
+        arcade.draw_text(
+            f"Loading {startup.current_stage() or ''}",
+            left,
+            top + LOADING_BAR_HEIGHT / 2,
+            arcade.color.BLACK,
+            font_size=LOADING_TEXT_SIZE,
+        )
+
     def on_draw(self):
         arcade.start_render()
         self.uimanager.draw()
+        self.draw_loading()
 
 
 class GameOverView(arcade.View):
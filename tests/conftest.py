@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+# Assets are loaded relative to the repository root, as when started from there
+os.chdir(ROOT)
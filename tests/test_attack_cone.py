@@ -0,0 +1,33 @@
+import math
+
+from pyglet.math import Vec2
+
+from engine.enemy_sim import EnemySimulation
+from entities.enemy import Enemy
+from entities.player import Player
+
+
+def test_cone_query_hits_what_the_player_can_attack():
+    player = Player()
+    player.center_x, player.center_y = 1000, 1000
+    sim = EnemySimulation()
+    enemies = []
+    # Just inside and outside the reach and the half disc edge, every way round
+    for distance in (0.5, 0.99, 1.01, 1.5):
+        for degrees in range(1, 360, 4):
+            angle = math.radians(degrees)
+            enemy = Enemy.from_tp(
+                0,
+                center_x=player.center_x + math.cos(angle) * distance * player.attack_range,
+                center_y=player.center_y + math.sin(angle) * distance * player.attack_range,
+            )
+            sim.add(enemy)
+            enemies.append(enemy)
+    for dir_x, dir_y in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+        player.direction = Vec2(dir_x, dir_y)
+        hit = sim.query_cone(player.center_x, player.center_y, dir_x, dir_y, player.attack_range)
+        expected = [
+            enemy for enemy in enemies if player.can_attack(Vec2(enemy.center_x, enemy.center_y))
+        ]
+        assert expected
+        assert set(map(id, hit)) == set(map(id, expected))
@@ -0,0 +1,67 @@
+import numpy as np
+
+from engine.collision import CollisionGrid
+
+
+TILE = 32
+
+
+def make_grid(solid):
+    """Grid whose solid tiles block over their whole square"""
+    rows, cols = np.indices(solid.shape)
+    boxes = (cols * TILE, rows * TILE, (cols + 1) * TILE, (rows + 1) * TILE)
+    boxes = tuple(np.asarray(box, dtype=np.float64) for box in boxes)
+    return CollisionGrid(solid, boxes, TILE, TILE)
+
+
+def wall_grid():
+    solid = np.zeros((20, 20), dtype=np.bool_)
+    solid[:, 10] = True  # x from 320 to 352
+    return make_grid(solid)
+
+
+def test_move_stops_at_the_wall_ahead():
+    grid = wall_grid()
+    x, y = grid.move(200, 300, 150, 0, 10, 12)
+    assert (x, y) == (310, 300)
+    # Even when a single step would carry the box through the wall
+    x, y = grid.move(200, 300, 400, 0, 10, 12)
+    assert (x, y) == (310, 300)
+    x, y = grid.move(450, 300, -400, 0, 10, 12)
+    assert (x, y) == (362, 300)
+
+
+def test_move_slides_along_the_wall():
+    grid = wall_grid()
+    x, y = grid.move(305, 300, 20, 15, 10, 12)
+    assert (x, y) == (310, 315)
+    x, y = grid.move(310, 300, 5, -40, 10, 12)
+    assert (x, y) == (310, 260)
+
+
+def test_move_is_batched():
+    grid = wall_grid()
+    x, y = grid.move(
+        np.array([200, 200, 400]), np.array([300, 300, 300]), np.array([150, -100, 20]),
+        np.array([0, 5, 0]), 10, 12,
+    )
+    assert x.tolist() == [310, 100, 420]
+    assert y.tolist() == [300, 305, 300]
+
+
+def test_move_only_stops_at_the_solid_part_of_a_tile():
+    solid = np.zeros((20, 20), dtype=np.bool_)
+    solid[9, 10] = True
+    grid = make_grid(solid)
+    # Just the bottom half of the tile at y 288 to 320 blocks
+    grid.box_y1[9, 10] = 304
+    x, y = grid.move(300, 295, 100, 0, 10, 5)
+    assert (x, y) == (310, 295)
+    x, y = grid.move(300, 312, 100, 0, 10, 5)
+    assert (x, y) == (400, 312)
+
+
+def test_box_inside_a_wall_can_get_out():
+    grid = wall_grid()
+    x, y = grid.move(330, 300, -30, 0, 10, 12)
+    assert (x, y) == (300, 300)
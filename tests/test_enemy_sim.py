@@ -0,0 +1,37 @@
+import arcade
+import numpy as np
+
+from engine.enemy_sim import LOD_NEAR_RADIUS, EnemySimulation
+from engine.sim_clock import SIM_TICK
+from entities.enemy import Enemy
+
+
+def test_sliced_enemies_glide_between_their_ticks():
+    sim = EnemySimulation()
+    enemy = Enemy.from_tp(0, center_x=2 * LOD_NEAR_RADIUS, center_y=0)
+    sim.add(enemy)
+    target = arcade.Sprite(center_x=0, center_y=0)
+    shown = []
+    for _ in range(30):
+        sim.step(SIM_TICK, target, -100, -500, 1280, 1000)
+        # Two frames per tick
+        for alpha in (0, 0.5):
+            sim.sync_sprites(alpha, -100, -500, 1280, 1000)
+            shown.append(enemy.center_x)
+    frame_steps = -np.diff(shown)[2 * sim.lod_slices :]
+    assert frame_steps.min() > 0
+    assert frame_steps.max() < 1.01 * frame_steps.min()
+
+
+def test_sprites_out_of_view_sync_once_the_view_reaches_them():
+    sim = EnemySimulation()
+    enemy = Enemy.from_tp(0, center_x=2 * LOD_NEAR_RADIUS, center_y=0)
+    sim.add(enemy)
+    target = arcade.Sprite(center_x=0, center_y=0)
+    for _ in range(sim.lod_slices):
+        sim.step(SIM_TICK, target, -100, -500, 1280, 1000)
+        sim.sync_sprites(1, 5000, 5000, 1280, 1000)
+    assert sim.x[enemy.sim_index] < 2 * LOD_NEAR_RADIUS
+    assert enemy.center_x == 2 * LOD_NEAR_RADIUS
+    sim.sync_sprites(1, -100, -500, 1280, 1000)
+    assert sim.x[enemy.sim_index] < enemy.center_x < 2 * LOD_NEAR_RADIUS
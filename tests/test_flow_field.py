@@ -0,0 +1,36 @@
+import numpy as np
+
+from engine.flow_field import UNREACHED, FlowField
+
+
+def assert_descends(field):
+    """Every reachable tile but the target points at a neighbour strictly closer to it"""
+    rows, cols = np.nonzero((field.distance != UNREACHED) & (field.distance > 0))
+    step_col = np.sign(np.round(field.dir_x[rows, cols], 6)).astype(np.int64)
+    step_row = np.sign(np.round(field.dir_y[rows, cols], 6)).astype(np.int64)
+    assert np.all((step_col != 0) | (step_row != 0))
+    assert np.all(
+        field.distance[rows + step_row, cols + step_col] < field.distance[rows, cols]
+    )
+
+
+def test_target_walking_in_eight_directions_keeps_descending_directions():
+    random = np.random.default_rng(3)
+    walkable = random.random((60, 60)) > 0.25
+    walkable[30, 30] = True
+    field = FlowField(walkable, 32, 32, update_radius=6, max_drift=20)
+    cell = (30, 30)
+    for _ in range(300):
+        field.set_target((cell[1] + 0.5) * 32, (cell[0] + 0.5) * 32)
+        assert_descends(field)
+        steps = [
+            (cell[0] + d_row, cell[1] + d_col)
+            for d_row in (-1, 0, 1)
+            for d_col in (-1, 0, 1)
+            if (d_row or d_col)
+            and 0 <= cell[0] + d_row < 60
+            and 0 <= cell[1] + d_col < 60
+            and walkable[cell[0] + d_row, cell[1] + d_col]
+        ]
+        cell = steps[random.integers(len(steps))]
+    assert field.partial_updates > 0
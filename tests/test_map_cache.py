@@ -0,0 +1,48 @@
+from os.path import basename, dirname, join
+import json
+import os
+import shutil
+
+import numpy as np
+
+from engine.map_cache import CompiledMap, _read_meta, compile_map, map_cache_path
+from views.game_view import MAP_PATH
+
+
+def test_compile_leaves_only_the_cache(tmp_path):
+    out_path = tmp_path / "map1.mapc"
+    compile_map(MAP_PATH, out_path)
+    assert os.listdir(tmp_path) == ["map1.mapc"]
+    assert _read_meta(out_path)[0] is not None
+
+
+def copy_map(map_path, directory):
+    """Copies the map and the tileset images it references, returns the copy's path"""
+    map_dir = dirname(map_path)
+    with open(map_path) as map_file:
+        tilesets = json.load(map_file)["tilesets"]
+    images = {tileset["image"] for tileset in tilesets if "image" in tileset}
+    for tileset in tilesets:
+        images.update(tile["image"] for tile in tileset.get("tiles", ()) if "image" in tile)
+    for image in images:
+        os.makedirs(directory / dirname(image), exist_ok=True)
+        shutil.copy(join(map_dir, image), directory / image)
+    copy_path = str(directory / basename(map_path))
+    shutil.copy(map_path, copy_path)
+    return copy_path
+
+
+def test_truncated_cache_is_compiled_again(tmp_path):
+    map_path = copy_map(MAP_PATH, tmp_path)
+    cache_path = map_cache_path(map_path)
+    expected = CompiledMap.load(map_path).gids.copy()
+    with open(cache_path, "rb") as cache_file:
+        data = cache_file.read()
+    for size in (len(data) // 2, 10):
+        # Replaced rather than truncated in place, the cache may be mapped already
+        truncated_path = cache_path + ".truncated"
+        with open(truncated_path, "wb") as truncated:
+            truncated.write(data[:size])
+        os.replace(truncated_path, cache_path)
+        assert _read_meta(cache_path) == (None, 0)
+        assert np.array_equal(CompiledMap.load(map_path).gids, expected)
@@ -0,0 +1,65 @@
+import hashlib
+import random
+
+import arcade
+
+from engine.headless import HeadlessWindow
+from engine.replay import InputRecorder, Replay
+from engine.rng import set_base_seed
+from main import replayable_game
+
+
+SEED = 5
+UPGRADES = [1, 101]
+FRAMES = 400
+KEYS = {
+    0: (arcade.key.D, arcade.key.W),
+    90: (arcade.key.A,),
+    200: (arcade.key.S,),
+}
+
+
+def start_game(upgrades):
+    set_base_seed(SEED)
+    window = HeadlessWindow(1280, 720)
+    game_view = replayable_game(upgrades)
+    window.show_view(game_view)
+    # Outlive the horde so the whole recording plays
+    game_view.player.hitpoints = game_view.player.max_hitpoints = 10**9
+    return window, game_view
+
+
+def state_hash(game_view):
+    sim = game_view.enemy_sim
+    digest = hashlib.sha256()
+    for name in ("x", "y", "prev_x", "prev_y", "hitpoints", "attacking_timer"):
+        digest.update(getattr(sim, name)[: sim.count].tobytes())
+    player = game_view.player
+    digest.update(repr((game_view.clock.ticks, player.position, player.hitpoints)).encode())
+    return digest.hexdigest()
+
+
+def test_replay_reproduces_jittered_recording(tmp_path):
+    window, game_view = start_game(UPGRADES)
+    recorder = InputRecorder(SEED, UPGRADES)
+    recorder.attach(window)
+    frame_times = random.Random(1)
+    held = ()
+    for frame in range(FRAMES):
+        if frame in KEYS:
+            for symbol in held:
+                window.on_key_release(symbol, 0)
+            held = KEYS[frame]
+            for symbol in held:
+                window.on_key_press(symbol, 0)
+        window.update(frame_times.uniform(0.002, 0.05))
+    recorded = state_hash(game_view)
+    path = tmp_path / "session.json"
+    recorder.save(path)
+
+    recording = Replay.load(path)
+    window, game_view = start_game(recording.upgrades)
+    assert game_view.player.acquired_upgrades_idf == set(UPGRADES)
+    assert recording.play(window) == FRAMES
+    assert game_view.clock.ticks > FRAMES
+    assert state_hash(game_view) == recorded
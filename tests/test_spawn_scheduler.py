@@ -0,0 +1,27 @@
+from engine.enemy_sim import in_rect
+from engine.headless import HeadlessWindow
+from engine.rng import set_base_seed
+from engine.spawn_scheduler import OutsideViewZone
+from views.game_view import GameView
+
+
+def test_outside_view_zone_spawns_out_of_sight():
+    set_base_seed(5)
+    window = HeadlessWindow(1280, 720)
+    game_view = GameView()
+    game_view.save_path = None
+    game_view.replayable = True
+    game_view.spawn_zone_type = OutsideViewZone
+    window.show_view(game_view)
+    spawns = []
+    acquire = game_view.enemy_pool.acquire
+
+    def record_spawn(tp, x, y):
+        spawns.append((x, y, *game_view.sim_view))
+        return acquire(tp, x, y)
+
+    game_view.enemy_pool.acquire = record_spawn
+    window.run(30)
+    assert len(spawns) >= game_view.get_enemies_cnt()
+    for x, y, view_x, view_y in spawns:
+        assert not in_rect(x, y, view_x, view_y, window.width, window.height)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from engine.rng import rng
+from engine.tile_index import TileIndex
+
+
+def make_index():
+    walkable = np.random.default_rng(4).random((40, 50)) > 0.7
+    return TileIndex(walkable, 32, 32)
+
+
+def test_sample_lands_on_walkable_tiles():
+    index = make_index()
+    rng.seed(1)
+    for _ in range(5000):
+        assert index.is_walkable(*index.sample())
+
+
+def test_sample_in_rect_lands_on_walkable_tiles_inside_it():
+    index = make_index()
+    rng.seed(2)
+    # Tile aligned edges as well as ones cutting through tiles and past the map
+    rects = ((64, 96, 320, 256), (70.5, 10.25, 100.75, 90.5), (-50, -50, 2000, 1500))
+    for x0, y0, x1, y1 in rects:
+        for _ in range(2000):
+            x, y = index.sample_in_rect(x0, y0, x1, y1)
+            assert x0 <= x <= x1 and y0 <= y <= y1
+            assert index.is_walkable(x, y)
+
+
+def test_sample_in_rect_without_walkable_tiles_is_none():
+    walkable = np.ones((10, 10), dtype=np.bool_)
+    walkable[2:5, 3:7] = False
+    index = TileIndex(walkable, 32, 32)
+    assert index.sample_in_rect(3 * 32, 2 * 32, 7 * 32, 5 * 32) is None
+    assert index.sample_in_rect(5000, 5000, 6000, 6000) is None